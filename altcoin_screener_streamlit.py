@@ -7,12 +7,28 @@ import time
 import os
 import math
 from datetime import datetime
-from rhythmic_analyzer import analyze_with_rhythmic, get_ohlcv_from_coinbase
+from rhythmic_analyzer import analyze_with_rhythmic, analyze_with_intraday, get_ohlcv_from_coinbase
 import re
 import numpy as np
+from market_listing import listing_store, PROCESSED_COLS, PRESETS, process_dataframe, compact_listing
+from filter_engine import RangeFilterEngine
+from table_view import render_table
+from metrics import metrics, start_http_exporter
+from provider_health import provider_health
+from config import METRICS_PORT, WARMUP_INTERVAL, PROVIDER_LIMITS
+from warmup import WarmupScheduler
+from shared_cache import shared_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+LISTING_SHARED_TTL = 60  # the snapshot itself refreshes on its own TTLs; this only bounds how stale a replica's view can be
 
 # --- PAGE CONFIG (Set once at the top) ---
 st.set_page_config(page_title="Crypto Screener", page_icon="📈", layout="wide")
+if METRICS_PORT: start_http_exporter(METRICS_PORT)
+
+@st.cache_resource
+def warmup_scheduler():
+    return WarmupScheduler().start() if WARMUP_INTERVAL > 0 else None
 
 # --- AUTHENTICATION & LOGIN PAGE UI ---
 def render_login_page():
@@ -71,6 +87,26 @@ def render_login_page():
     </div>
     """, unsafe_allow_html=True)
 
+# --- METRICS PANEL ---
+def render_metrics_panel():
+    with st.sidebar.expander("📟 متریک‌های عملکرد"):
+        spans = metrics.last_spans()
+        if spans:
+            st.caption("زمان مراحل (آخرین اجرا)")
+            st.dataframe(pd.DataFrame([{"stage": k, "ms": round(v * 1000, 1)} for k, v in spans.items()]), hide_index=True)
+        providers = metrics.provider_summary()
+        if providers:
+            st.caption("منابع داده")
+            st.dataframe(pd.DataFrame(providers), hide_index=True)
+        health = provider_health.snapshot()
+        if health:
+            st.caption("سلامت منابع (میانگین متحرک)")
+            st.dataframe(pd.DataFrame(health), hide_index=True)
+        lookups, fetches = metrics.counter("ohlcv_lookups_total"), metrics.counter("ohlcv_fetches_total")
+        if lookups: st.caption(f"کش OHLCV: {max(lookups - fetches, 0):,.0f} برخورد از {lookups:,.0f} درخواست")
+        st.download_button("⬇️ JSON", metrics.to_json(), file_name="metrics.json", mime="application/json")
+        st.download_button("⬇️ Prometheus", metrics.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+
 # --- MAIN APP LOGIC ---
 def main_app():
     st.markdown("""
@@ -98,73 +134,34 @@ def main_app():
     
     st.title("📈 داشبورد غربال‌گری و تحلیل ریتمیک آلت‌کوین‌ها")
     
-    API_URL, PER_PAGE = "https://api.coinmarketcap.com/data-api/v3/cryptocurrency/listing", 100
-    RAW_COLS = {'symbol': 'symbol', 'name': 'name', 'price': 'price', 'volume24h': 'volume24h', 'marketCap': 'marketCap', 'percentChange7d': 'percentChange7d'}
-    PROCESSED_COLS = {'symbol': 'symbol', 'name': 'name', 'price': 'price', 'volume_24h': 'volume_24h', 'market_cap': 'market_cap', 'percent_change_7d': 'percent_change_7d'}
-    RENAME_MAP = {RAW_COLS['volume24h']: PROCESSED_COLS['volume_24h'], RAW_COLS['marketCap']: PROCESSED_COLS['market_cap'], RAW_COLS['percentChange7d']: PROCESSED_COLS['percent_change_7d']}
-    NUMERIC_COLS = [PROCESSED_COLS['price'], PROCESSED_COLS['volume_24h'], PROCESSED_COLS['market_cap'], PROCESSED_COLS['percent_change_7d']]
-    
-    PRESETS = {
-        "Conservative": {'min_market_cap': 50e6, 'max_market_cap': 500e6, 'min_volume_mc': 0.10, 'max_volume_mc': 0.80, 'min_change_7d': -2.0, 'max_change_7d': 12.0},
-        "Balanced": {'min_market_cap': 10e6, 'max_market_cap': 150e6, 'min_volume_mc': 0.20, 'max_volume_mc': 1.00, 'min_change_7d': -2.0, 'max_change_7d': 15.0},
-        "Aggressive": {'min_market_cap': 1e6, 'max_market_cap': 100e6, 'min_volume_mc': 0.30, 'max_volume_mc': 2.00, 'min_change_7d': -8.0, 'max_change_7d': 25.0}
-    }
-
-    @st.cache_data(ttl=14400, show_spinner=False)
     def load_or_fetch_data():
-        def fetch_total_coins():
-            r = requests.get(API_URL, params={'start':1,'limit':1}); r.raise_for_status(); return int(r.json()['data']['totalCount'])
-        def fetch_page(start=1, limit=PER_PAGE):
-            params = {'start': start, 'limit': limit, 'sortBy':'market_cap','sortType':'desc'}; r = requests.get(API_URL, params=params); r.raise_for_status(); return r.json()['data']['cryptoCurrencyList']
-        try: total_coins_to_fetch = fetch_total_coins()
-        except Exception as e: return f"خطا در دریافت تعداد کوین‌ها: {e}"
-        rows, fetch_limit, start_index = [], min(total_coins_to_fetch, 10000), 1
-        while start_index <= fetch_limit:
-            try:
-                lst = fetch_page(start=start_index, limit=PER_PAGE)
-                if not lst: break
-                for c in lst:
-                    q = c.get('quotes', [{}])[0]
-                    rows.append({'symbol': c.get('symbol'), 'name': c.get('name'), 'price': q.get('price', None), 'volume24h': q.get('volume24h', None), 'marketCap': q.get('marketCap', None), 'percentChange7d': q.get('percentChange7d', None)})
-                start_index += PER_PAGE
-                time.sleep(0.5)
-            except Exception as e: return f"خطا در واکشی: {e}"
-        return pd.DataFrame(rows)
+        # shared across sessions and replicas: only one of them reads (or, on a cold start, crawls) the listing at a time
+        try: return shared_cache.get_or_compute("listing:current", listing_store.current, ttl=LISTING_SHARED_TTL)
+        except Exception as e: return None, f"خطا در واکشی: {e}"
 
-    def process_dataframe(df: pd.DataFrame):
-        if df is None or df.empty: return None
-        processed_df = df.copy()
-        processed_df.rename(columns=RENAME_MAP, inplace=True)
-        for col in NUMERIC_COLS: processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce')
-        critical_cols = [PROCESSED_COLS['market_cap'], PROCESSED_COLS['volume_24h']]
-        for col in critical_cols: processed_df[col] = processed_df[col].replace(0, np.nan)
-        processed_df.dropna(subset=NUMERIC_COLS, inplace=True)
-        return processed_df
-
-    def style_dataframe(df):
-        def _color_change(val):
-            if not isinstance(val, (int, float)): return ''; return f"color: {'#4CAF50' if val > 0 else ('#F44336' if val < 0 else 'white')}"
-        def _style_vci(v):
-            if not isinstance(v, (int, float)): return '';
-            if v > 2.5: return 'background-color: #FFC107';
-            if v > 1.6: return 'background-color: #4CAF50'; return ''
-        styled = df.style.map(_color_change, subset=[c for c in [PROCESSED_COLS['percent_change_7d'], 'mom'] if c in df.columns])
-        if 'vci' in df.columns: styled = styled.map(_style_vci, subset=['vci'])
-        formats = {'price': "${:,.4f}",'market_cap': "${:,.0f}",'volume_24h': "${:,.0f}",'percent_change_7d': "{:,.2f}%","mom": "{:,.2f}%", "volume_mc_ratio": "{:,.2f}", "score": "{:,.3f}"}
-        return styled.format({k: v for k, v in formats.items() if k in df.columns})
-
-    def make_name_clickable(df):
-        df_display = df.copy()
-        if 'name' not in df_display.columns: return df_display
-        def _create_slug(name): return re.sub(r'[^a-zA-Z0-9 -]', '', str(name)).strip().lower().replace(' ', '-')
-        df_display['name'] = df_display.apply(lambda row: f'<a target="_blank" href="https://coinmarketcap.com/currencies/{_create_slug(row["name"])}/">{row["name"]}</a>', axis=1)
-        return df_display
+    @st.cache_resource(max_entries=2, show_spinner=False)
+    def prepare_listing(snapshot_id: str, _raw_df: pd.DataFrame):
+        processed = process_dataframe(_raw_df)
+        if processed is None or processed.empty: return None, None
+        compact = compact_listing(processed)
+        return compact, RangeFilterEngine(compact)
 
     if st.sidebar.button("خروج از حساب"):
         st.session_state["authenticated"] = False; st.rerun()
     st.sidebar.header("واکشی اطلاعات")
     if st.sidebar.button("🔄 پاک کردن کش و واکشی مجدد"):
-        st.cache_data.clear(); st.rerun()
+        st.cache_data.clear(); shared_cache.invalidate("listing:current"); listing_store.refresh_async(full=True); st.rerun()
+    listing_meta = listing_store.meta()
+    if listing_meta:
+        st.sidebar.caption(f"آخرین به‌روزرسانی: {datetime.fromtimestamp(listing_meta['head_refreshed_at']):%Y-%m-%d %H:%M} (کامل: {datetime.fromtimestamp(listing_meta['full_refreshed_at']):%Y-%m-%d %H:%M})")
+    if listing_store.is_refreshing(): st.sidebar.caption("⏳ به‌روزرسانی لیست در پس‌زمینه در حال انجام است...")
+    if listing_store.last_error: st.sidebar.caption(f"⚠️ آخرین به‌روزرسانی ناموفق بود: {listing_store.last_error}")
+    warmup = warmup_scheduler()
+    if warmup and warmup.last_run and "warmed" in warmup.last_run:
+        failed = warmup.last_run.get("failed") or 0
+        st.sidebar.caption(f"🔥 پیش‌واکشی: {warmup.last_run['warmed']:,} از {warmup.last_run['symbols']:,} ارز ({datetime.fromtimestamp(warmup.last_run['started_at']):%H:%M})"
+                           + (f" — {failed:,} خطا" if failed else ""))
+    elif warmup: st.sidebar.caption("🔥 پیش‌واکشی داده‌ها در پس‌زمینه در حال انجام است...")
     st.sidebar.header("تنظیمات فیلتر")
     preset = st.sidebar.selectbox("انتخاب پریست", list(PRESETS.keys()), index=1)
     p = PRESETS[preset]
@@ -176,11 +173,12 @@ def main_app():
         min_ch7 = st.slider("حداقل تغییرات ۷ روزه (%)", -50.0, 50.0, p['min_change_7d'])
         max_ch7 = st.slider("حداکثر تغییرات ۷ روزه (%)", -50.0, 100.0, p['max_change_7d'])
 
-    with st.spinner("در حال واکشی و پردازش داده‌ها..."):
-        raw_df = load_or_fetch_data()
+    with st.spinner("در حال واکشی و پردازش داده‌ها..."), metrics.span("listing_load"):
+        snapshot_id, raw_df = load_or_fetch_data()
     if isinstance(raw_df, str): st.error(raw_df); st.stop()
     if raw_df is None or raw_df.empty: st.error("خطا در واکشی داده‌ها."); st.stop()
-    df = process_dataframe(raw_df)
+    with metrics.span("process"):
+        df, filter_engine = prepare_listing(snapshot_id, raw_df)
     if df is None or df.empty: st.warning("هیچ ارز معتبری برای تحلیل یافت نشد."); st.stop()
         
     st.sidebar.markdown("---"); st.sidebar.header("آمار داده‌ها")
@@ -188,8 +186,8 @@ def main_app():
     st.sidebar.metric("تعداد ارزهای معتبر (پس از پاکسازی)", f"{len(df):,}")
 
     filter_params = {'min_market_cap': min_mc, 'max_market_cap': max_mc, 'min_volume_mc': min_vmc,'max_volume_mc': max_vmc, 'min_change_7d': min_ch7, 'max_change_7d': max_ch7}
-    df['volume_mc_ratio'] = df[PROCESSED_COLS['volume_24h']] / (df[PROCESSED_COLS['market_cap']] + 1e-9)
-    filtered = df[(df[PROCESSED_COLS['market_cap']] >= filter_params['min_market_cap']) & (df[PROCESSED_COLS['market_cap']] <= filter_params['max_market_cap']) & (df['volume_mc_ratio'] >= filter_params['min_volume_mc']) & (df['volume_mc_ratio'] <= filter_params['max_volume_mc']) & (df[PROCESSED_COLS['percent_change_7d']] >= filter_params['min_change_7d']) & (df[PROCESSED_COLS['percent_change_7d']] <= filter_params['max_change_7d'])]
+    with metrics.span("filter"):
+        filtered = filter_engine.filter(filter_params)
     st.info(f"از مجموع **{len(df):,}** ارز معتبر بررسی شده، **{len(filtered):,}** ارز با فیلترهای شما مطابقت دارند.")
     
     st.sidebar.markdown("---")
@@ -202,37 +200,52 @@ def main_app():
             total_symbols = len(symbols_to_fetch)
             st.sidebar.info(f"شروع واکشی برای {total_symbols} ارز از Coinbase...")
             progress_bar = st.sidebar.progress(0, text="شروع...")
-            results = []
-            for i, symbol in enumerate(symbols_to_fetch):
-                progress_bar.progress((i + 1) / total_symbols, text=f"واکشی {symbol}...")
-                data = get_ohlcv_from_coinbase(symbol)
-                if data: results.append({'symbol': symbol, 'closes': len(data['closes']), 'volumes': sum(data['volumes']) > 0})
-                time.sleep(0.3)
+            candles = {}
+            with ThreadPoolExecutor(max_workers=PROVIDER_LIMITS["coinbase"]["max_concurrency"]) as pool:
+                futures = {pool.submit(get_ohlcv_from_coinbase, symbol): symbol for symbol in symbols_to_fetch}
+                for done, fut in enumerate(as_completed(futures), start=1):
+                    progress_bar.progress(done / total_symbols, text=f"واکشی {futures[fut]}...")
+                    if fut.result(): candles[futures[fut]] = fut.result()
+            st.session_state["coinbase_candles"] = candles
             progress_bar.progress(1.0, text="واکشی کامل شد!")
-            st.sidebar.success(f"{len(results)} ارز با موفقیت از Coinbase دریافت شد.")
-            if results:
-                with st.expander(" مشاهده نتایج واکشی از Coinbase"):
-                    st.dataframe(pd.DataFrame(results))
+            st.sidebar.success(f"{len(candles)} ارز با موفقیت از Coinbase دریافت شد.")
+    candles = st.session_state.get("coinbase_candles")
+    if candles:
+        with st.expander(" مشاهده نتایج واکشی از Coinbase"):
+            st.dataframe(pd.DataFrame([{'symbol': symbol, 'closes': len(data['closes']), 'last_close': data['closes'][-1],
+                                        'change_%': round((data['closes'][-1] / data['closes'][0] - 1) * 100, 2) if data['closes'][0] else None,
+                                        'volumes': sum(data['volumes']) > 0} for symbol, data in candles.items()]))
     
     tab1, tab2 = st.tabs(["📄 **نتایج اولیه**", "🎯 **تحلیل ریتمیک**"])
     with tab1:
         st.subheader("لیست کاندیداهای اولیه")
         if filtered.empty: st.warning("هیچ ارزی با فیلترهای فعلی یافت نشد.")
-        else: st.write(style_dataframe(make_name_clickable(filtered)).to_html(escape=False), unsafe_allow_html=True)
+        else:
+            with metrics.span("render_candidates"):
+                render_table(filtered, key="candidates", sort_by=PROCESSED_COLS['market_cap'])
     with tab2:
         st.subheader("تحلیل عمیق بر اساس ریتم بازار")
         if filtered.empty:
             st.warning("برای تحلیل ریتمیک، ابتدا باید کاندیداهایی در تب نتایج اولیه وجود داشته باشد.")
-        elif st.button("🚀 شروع تحلیل ریتمیک نهایی"):
-            recs = filtered[[PROCESSED_COLS['symbol'], PROCESSED_COLS['name'], PROCESSED_COLS['percent_change_7d']]].to_dict("records")
-            progress_bar = st.progress(0.0, text="آماده‌سازی برای تحلیل...")
-            status_text = st.empty()
-            results = analyze_with_rhythmic(recs, progress_bar=progress_bar, status_text=status_text)
-            if results:
-                st.success("✅ تحلیل با موفقیت به پایان رسید!")
-                df_r = pd.DataFrame(results)
+        else:
+            modes = {"روزانه (۳۰ روز)": None, "درون‌روزی ۱ ساعته": "1h", "درون‌روزی ۱۵ دقیقه‌ای": "15m"}
+            interval = modes[st.radio("بازه کندل‌ها", list(modes), horizontal=True)]
+            analysis_key = (snapshot_id, tuple(sorted(filter_params.items())), interval)
+            if st.button("🚀 شروع تحلیل ریتمیک نهایی"):
+                recs = filtered[[PROCESSED_COLS['symbol'], PROCESSED_COLS['name'], PROCESSED_COLS['percent_change_7d']]].to_dict("records")
+                progress_bar = st.progress(0.0, text="آماده‌سازی برای تحلیل...")
+                status_text = st.empty()
+                with metrics.span("rhythmic_analysis"):
+                    if interval: results = analyze_with_intraday(recs, progress_bar=progress_bar, status_text=status_text, interval=interval)
+                    else: results = analyze_with_rhythmic(recs, progress_bar=progress_bar, status_text=status_text)
+                st.session_state["rhythmic_analysis"] = {"key": analysis_key, "results": results}
+                if results: st.success("✅ تحلیل با موفقیت به پایان رسید!")
+                else: st.error("تحلیل نتیجه‌ای در بر نداشت یا با خطا مواجه شد.")
+            analysis = st.session_state.get("rhythmic_analysis")
+            if analysis and analysis["key"] == analysis_key and analysis["results"]:
+                df_r = pd.DataFrame(analysis["results"])
                 df_r = pd.merge(df_r, filtered[[PROCESSED_COLS['symbol'], PROCESSED_COLS['name']]], on=PROCESSED_COLS['symbol'], how='left')
-                passed = df_r[df_r["pass"] == True].sort_values("score", ascending=False)
+                passed = df_r[df_r["pass"] == True]
                 st.markdown("---"); st.subheader("📊 خلاصه نتایج")
                 col1, col2, col3 = st.columns(3)
                 col1.metric("کاندیداها", f"{len(df_r):,}")
@@ -240,8 +253,10 @@ def main_app():
                 col3.metric("ردشدگان", f"{len(df_r) - len(passed):,}")
                 st.markdown("---"); st.subheader("🏆 لیست نهایی قبول‌شدگان")
                 if passed.empty: st.warning("هیچ ارزی از تحلیل ریتمیک عبور نکرد.")
-                else: st.write(style_dataframe(make_name_clickable(passed)).to_html(escape=False), unsafe_allow_html=True)
-            else: st.error("تحلیل نتیجه‌ای در بر نداشت یا با خطا مواجه شد.")
+                else:
+                    with metrics.span("render_results"):
+                        render_table(passed, key="passed", sort_by="score")
+    render_metrics_panel()
 
 # --- SCRIPT EXECUTION STARTS HERE ---
 if "authenticated" not in st.session_state: st.session_state["authenticated"] = False
@@ -0,0 +1,230 @@
+# backtest.py
+"""Vectorized replay of the preset filter and the rhythm score over stored daily history.
+
+Every coin and day is scored at once (NumPy sliding windows, no per-coin loops) for each preset x VCI
+threshold x momentum window, and the picks are judged by their forward returns, hit rate and turnover.
+Market cap history is approximated as close x the current circulating supply (listing marketCap / price).
+
+    python backtest.py --backfill 365 --output backtest.csv
+    python backtest.py --horizons 1 7 14 --workers 4
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from config import OHLCV_MAX_WORKERS
+from candle_store import candle_store
+from market_listing import listing_store, PRESETS
+from metrics import metrics
+from rhythmic_analyzer import (DAY, VCI_WINDOW, VCI_PASS, VCI_FULL_SCORE, MOM_MIN, MOM_MAX, VCI_WEIGHT, MOM_WEIGHT, OHLCV_PROVIDERS,
+                               BINANCE_MAX_CANDLES, get_ohlcv_from_binance, get_daily_history_from_coingecko, get_ohlcv_from_coinpaprika)
+
+DEFAULT_HORIZONS = (1, 3, 7)
+VCI_GRID = (1.2, 1.4, VCI_PASS, 1.8, 2.0, VCI_FULL_SCORE)
+MOM_GRID = ((MOM_MIN, MOM_MAX), (0.0, 8.0), (2.0, 20.0), (-5.0, 25.0))
+COINGECKO_MAX_DAYS = 365  # public API history limit
+QUOTE_VOLUME_PROVIDERS = {"coingecko", "coinpaprika"}  # Binance and Coinbase report volume in base units
+PROVIDER_PREFERENCE = ["binance", "coingecko", "coinpaprika", "coinbase"]
+REPORT_COLUMNS = ["preset", "vci_pass", "mom_min", "mom_max", "horizon", "signals", "names_per_day", "mean_return", "median_return",
+                  "hit_rate", "excess_return", "turnover", "score_ic"]
+
+# === History ===
+# provider -> (fetcher(symbol, days), most days of daily history it can return in one go; None = unbounded)
+_BACKFILL = {
+    "binance": (lambda s, days: get_ohlcv_from_binance(s.upper() + "USDT", "1d", days), BINANCE_MAX_CANDLES),
+    "coingecko": (get_daily_history_from_coingecko, COINGECKO_MAX_DAYS),
+    "coinpaprika": (get_ohlcv_from_coinpaprika, None),
+}
+
+def backfill(symbols: list[str], days: int = 365, max_workers: int = OHLCV_MAX_WORKERS) -> int:
+    """Make sure each symbol's daily history from its first listed provider reaches back `days` days; returns how
+    many series were fetched from scratch.
+
+    The fetchers only extend forward, so a series is re-downloaded once when its history was never requested back
+    to the window start; that request is recorded, so coins younger than `days` are not fetched again on every run.
+    Complete series are only topped up from their last stored candle.
+    """
+    def one(symbol):
+        provider = next((p for p, (listed, *_) in OHLCV_PROVIDERS.items() if listed(symbol)), None)
+        if provider is None: return False
+        fetcher, max_days = _BACKFILL[provider]
+        n = days if max_days is None else min(days, max_days)
+        start = (int(time.time()) // DAY - n + 1) * DAY
+        key = OHLCV_PROVIDERS[provider][2](symbol)
+        since = candle_store.history_since(key, provider)
+        complete = since is not None and since <= start
+        try:
+            if not complete: candle_store.delete_series(key, provider)
+            fetched = fetcher(symbol, n) is not None
+        except Exception: return False
+        if fetched and not complete: candle_store.mark_history(key, provider, start)
+        return fetched and not complete
+    with metrics.span("backtest_backfill"), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return sum(pool.map(one, symbols))
+
+def load_panel(listing: pd.DataFrame, days: int | None = None) -> dict:
+    """Align stored daily candles into (coins x days) matrices, one provider per coin (the longest series)."""
+    supply = listing.drop_duplicates("symbol").set_index("symbol")
+    supply = (supply["marketCap"] / supply["price"]).replace([np.inf, -np.inf], np.nan).dropna()
+    hist = candle_store.history("1d")
+    hist["symbol"] = np.where(hist["provider"] == "binance", hist["symbol"].str.removesuffix("USDT"), hist["symbol"])
+    hist = hist[hist["symbol"].isin(supply.index)]
+    counts = hist.groupby(["symbol", "provider"]).size().reset_index(name="n")
+    counts["rank"] = counts["provider"].map({p: i for i, p in enumerate(PROVIDER_PREFERENCE)})
+    best = counts.sort_values(["n", "rank"], ascending=[False, True]).drop_duplicates("symbol")
+    hist = hist.merge(best[["symbol", "provider"]], on=["symbol", "provider"])
+    if hist.empty: raise ValueError("no stored daily history for the listed coins (run with --backfill)")
+    day = (hist["ts"].to_numpy() // DAY) * DAY
+    first = day.max() - (days - 1) * DAY if days else day.min()
+    keep = day >= first
+    hist, day = hist[keep], day[keep]
+    symbols = np.sort(hist["symbol"].unique())
+    rows = np.searchsorted(symbols, hist["symbol"].to_numpy())
+    cols = ((day - first) // DAY).astype(np.int64)
+    shape = (len(symbols), int(cols.max()) + 1)
+    close, volume, volume_usd = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+    close[rows, cols] = hist["close"].to_numpy()
+    volume[rows, cols] = hist["volume"].to_numpy()  # as stored, i.e. what simple_rhythm_filter sees live
+    quote = hist["provider"].isin(QUOTE_VOLUME_PROVIDERS).to_numpy()
+    volume_usd[rows, cols] = np.where(quote, hist["volume"], hist["volume"] * hist["close"])
+    return {"symbols": symbols, "days": first + DAY * np.arange(shape[1]), "close": close, "volume": volume,
+            "volume_usd": volume_usd, "supply": supply.reindex(symbols).to_numpy()}
+
+# === Features (shared by every parameter set) ===
+def compute_features(panel: dict, horizons=DEFAULT_HORIZONS, window: int = VCI_WINDOW, chunk: int = 1024) -> dict:
+    """VCI comes from the raw stored volume (as in simple_rhythm_filter); only the volume/market-cap ratio uses USD volume."""
+    close, volume = panel["close"], panel["volume"]
+    n, t = close.shape
+    v_ref, window_sum = np.full((n, t), np.nan), np.full((n, t), np.nan)
+    for lo in range(0, n, chunk):  # bounds the (chunk, t, window) temporary
+        w = sliding_window_view(volume[lo:lo + chunk], window, axis=1)
+        v_ref[lo:lo + chunk, window - 1:] = np.median(w, axis=-1)
+        window_sum[lo:lo + chunk, window - 1:] = w.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vci = volume / (v_ref + 1e-9)
+        mom7 = np.full((n, t), np.nan)
+        mom7[:, 7:] = (close[:, 7:] / close[:, :-7] - 1) * 100
+        market_cap = close * panel["supply"][:, None]
+        fwd = {}
+        for h in horizons:
+            fwd[h] = np.full((n, t), np.nan)
+            fwd[h][:, :-h] = close[:, h:] / close[:, :-h] - 1
+        return {"valid": ~np.isnan(v_ref), "has_volume": window_sum > 0, "vci": vci, "mom7": mom7, "market_cap": market_cap,
+                "volume_mc": panel["volume_usd"] / (market_cap + 1e-9), "fwd": fwd}
+
+# === Evaluation ===
+def param_grid(presets: dict = PRESETS, vci_grid=VCI_GRID, mom_grid=MOM_GRID) -> list[dict]:
+    """One work unit per preset x momentum window; the VCI thresholds are swept inside a unit, sharing its masks."""
+    return [{"preset": name, "mom_min": lo, "mom_max": hi, "vci_grid": tuple(vci_grid)} for name in presets for lo, hi in mom_grid]
+
+def _turnover(signal: np.ndarray) -> float:
+    """Mean share of each day's picks that were not picked the day before."""
+    size = signal[:, 1:].sum(axis=0)
+    kept = (signal[:, 1:] & signal[:, :-1]).sum(axis=0)
+    days = size > 0
+    return float(np.mean(1 - kept[days] / size[days])) if days.any() else np.nan
+
+def _daily_ic(score: np.ndarray, ret: np.ndarray, mask: np.ndarray) -> float:
+    """Average across days of the cross-sectional correlation between score and forward return."""
+    m = mask.astype(float)
+    k = m.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x, y = np.where(mask, score, 0.0), np.where(mask, ret, 0.0)
+        mx, my = x.sum(axis=0) / k, y.sum(axis=0) / k
+        dx, dy = (x - mx) * m, (y - my) * m
+        ic = (dx * dy).sum(axis=0) / np.sqrt((dx * dx).sum(axis=0) * (dy * dy).sum(axis=0))
+    ic = ic[(k >= 3) & np.isfinite(ic)]
+    return float(ic.mean()) if len(ic) else np.nan
+
+def _vci_pass(features: dict, threshold: float) -> np.ndarray:
+    # coins without volume data pass on momentum alone, as in rhythm_result
+    return ~features["has_volume"] | (features["vci"] >= threshold)
+
+def rhythm_signal(features: dict, threshold: float = VCI_PASS, mom_min: float = MOM_MIN, mom_max: float = MOM_MAX) -> np.ndarray:
+    """(coins x days) mask of where simple_rhythm_filter would pass, before any preset filter."""
+    mom = features["mom7"]
+    return features["valid"] & (mom >= mom_min) & (mom <= mom_max) & _vci_pass(features, threshold)
+
+def evaluate(features: dict, unit: dict, horizons=DEFAULT_HORIZONS, presets: dict = PRESETS) -> list[dict]:
+    """Replay one preset x momentum window over every coin and day; one report row per VCI threshold and horizon."""
+    p = presets[unit["preset"]]
+    mc, vmc, mom, vci, has_volume = features["market_cap"], features["volume_mc"], features["mom7"], features["vci"], features["has_volume"]
+    eligible = ((mc >= p["min_market_cap"]) & (mc <= p["max_market_cap"]) & (vmc >= p["min_volume_mc"]) & (vmc <= p["max_volume_mc"])
+                & (mom >= p["min_change_7d"]) & (mom <= p["max_change_7d"]) & features["valid"])
+    lo, hi = unit["mom_min"], unit["mom_max"]
+    in_momentum = eligible & (mom >= lo) & (mom <= hi)
+    score = (VCI_WEIGHT * np.where(has_volume, np.clip((vci - 1.0) / (VCI_FULL_SCORE - 1.0), 0, 1), 0.0)
+             + MOM_WEIGHT * np.clip((mom - lo) / (hi - lo), 0, 1))
+    active_days = features["valid"].any(axis=0)
+    per_horizon = {}
+    for h in horizons:
+        ret = features["fwd"][h]
+        base = eligible & ~np.isnan(ret)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            universe = np.where(base, ret, 0.0).sum(axis=0) / base.sum(axis=0)  # same-day mean over the preset's universe
+        per_horizon[h] = (ret, ret - universe[None, :], _daily_ic(score, ret, base))
+    rows = []
+    for threshold in unit["vci_grid"]:
+        signal = in_momentum & _vci_pass(features, threshold)
+        common = {"preset": unit["preset"], "vci_pass": threshold, "mom_min": lo, "mom_max": hi,
+                  "names_per_day": float(signal[:, active_days].sum(axis=0).mean()), "turnover": _turnover(signal)}
+        for h, (ret, excess, ic) in per_horizon.items():
+            picked = signal & ~np.isnan(ret)
+            r = ret[picked]
+            rows.append({**common, "horizon": h, "signals": int(picked.sum()),
+                         "mean_return": float(r.mean()) if len(r) else np.nan, "median_return": float(np.median(r)) if len(r) else np.nan,
+                         "hit_rate": float((r > 0).mean()) if len(r) else np.nan,
+                         "excess_return": float(excess[picked].mean()) if len(r) else np.nan, "score_ic": ic})
+    return rows
+
+_worker_state = {}
+
+def _init_worker(features: dict, horizons):
+    _worker_state.update(features=features, horizons=horizons)
+
+def _evaluate_in_worker(unit: dict) -> list[dict]:
+    return evaluate(_worker_state["features"], unit, _worker_state["horizons"])
+
+def run_grid(features: dict, grid: list[dict], horizons=DEFAULT_HORIZONS, workers: int = 1) -> pd.DataFrame:
+    """Evaluate every grid unit; with workers > 1 they fan out over a process pool (features sent once per worker)."""
+    with metrics.span("backtest_grid"):
+        if workers <= 1:
+            rows = [row for unit in grid for row in evaluate(features, unit, horizons)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features, horizons)) as pool:
+                rows = [row for result in pool.map(_evaluate_in_worker, grid) for row in result]
+    return pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+def backtest(days: int | None = 365, horizons=DEFAULT_HORIZONS, grid: list[dict] | None = None, workers: int = 1,
+             backfill_days: int | None = None) -> pd.DataFrame:
+    listing = listing_store.load()
+    if backfill_days: backfill(listing["symbol"].drop_duplicates().tolist(), backfill_days)
+    with metrics.span("backtest_features"):
+        features = compute_features(load_panel(listing, days), horizons)
+    return run_grid(features, grid or param_grid(), horizons, workers)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest the preset filter and rhythm thresholds over stored daily history.")
+    parser.add_argument("--days", type=int, default=365, help="most recent days of history to replay")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS), help="forward return horizons, in days")
+    parser.add_argument("--presets", nargs="+", choices=list(PRESETS), default=list(PRESETS))
+    parser.add_argument("--vci-grid", type=float, nargs="+", default=list(VCI_GRID))
+    parser.add_argument("--backfill", type=int, default=None, metavar="DAYS", help="first fetch DAYS of daily history for every listed coin")
+    parser.add_argument("--workers", type=int, default=1, help="processes for the parameter grid")
+    parser.add_argument("--output", "-o", default=None, help="write the report as CSV (printed otherwise)")
+    args = parser.parse_args(argv)
+
+    grid = param_grid({name: PRESETS[name] for name in args.presets}, args.vci_grid)
+    report = backtest(args.days, tuple(args.horizons), grid, args.workers, args.backfill)
+    if args.output: report.to_csv(args.output, index=False)
+    else: print(report.sort_values(["horizon", "excess_return"], ascending=[True, False]).to_string(index=False))
+    spans = metrics.last_spans()
+    print(" ".join(f"{k}={v:.2f}s" for k, v in spans.items() if k.startswith("backtest_")), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
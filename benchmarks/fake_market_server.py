@@ -0,0 +1,218 @@
+# benchmarks/fake_market_server.py
+"""Local stand-in for the market-data APIs used by the screener.
+
+Serves responses shaped like CoinMarketCap's listing, Binance `exchangeInfo`/`klines`, CoinGecko
+`coins/list`/`ohlc`/`market_chart`, CoinPaprika `coins`/`tickers/{id}/historical` and Coinbase
+`products/{id}/candles`. Payloads are synthesized deterministically from the coin index, so runs
+are reproducible without network access. Latency and HTTP 429 injection are configurable.
+
+    python benchmarks/fake_market_server.py --coins 1000 --latency-ms 40 --rate-429 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+
+DAY = 86400
+HISTORY_DAYS = 400
+ENV_PREFIXES = {"CMC_API_BASE": "/cmc", "BINANCE_API_BASE": "/binance", "COINGECKO_API_BASE": "/coingecko",
+                "COINPAPRIKA_API_BASE": "/coinpaprika", "COINBASE_API_BASE": "/coinbase"}
+
+# === Synthetic universe ===
+class Universe:
+    """Coin i (1-based) is C{i}; market cap falls with rank. Providers: i % 10 in 0-5 Binance,
+    6-7 CoinGecko (also listed on CoinPaprika), 8 CoinPaprika, 0 and 9 Coinbase."""
+
+    def __init__(self, n_coins: int, seed: int = 7):
+        self.n = n_coins
+        rng = np.random.default_rng(seed)
+        self.market_cap = 2e10 / np.arange(1, n_coins + 1) ** 1.1
+        self.volume = self.market_cap * rng.uniform(0.02, 2.0, n_coins)
+        self.price = rng.lognormal(0, 2.5, n_coins)
+        self.change_7d = rng.uniform(-20, 30, n_coins)
+
+    def symbol(self, i: int) -> str:
+        return f"C{i}"
+
+    def index(self, symbol: str) -> int | None:
+        try: i = int(symbol.upper().removesuffix("USDT").removesuffix("-USD").lstrip("C"))
+        except ValueError: return None
+        return i if 1 <= i <= self.n else None
+
+    def listing(self, start: int, limit: int) -> list:
+        out = []
+        for i in range(start, min(start + limit, self.n + 1)):
+            k = i - 1
+            out.append({"id": i, "symbol": self.symbol(i), "name": f"Coin {i}", "cmcRank": i,
+                        "quotes": [{"name": "USD", "price": float(self.price[k]), "volume24h": float(self.volume[k]),
+                                    "marketCap": float(self.market_cap[k]), "percentChange7d": float(self.change_7d[k])}]})
+        return out
+
+    def candles(self, i: int, step: int, count: int, end_ts: int | None = None):
+        """(times, closes, volumes) for `count` candles of `step` seconds ending at the current candle."""
+        end_ts = (int(time.time()) // step * step) if end_ts is None else end_ts
+        rng = np.random.default_rng(zlib.crc32(f"{i}:{step}".encode()))
+        times = end_ts - step * np.arange(count)[::-1]
+        closes = self.price[i - 1] * np.exp(np.cumsum(rng.normal(0, 0.04, count)))
+        volumes = (self.volume[i - 1] / self.price[i - 1]) * rng.lognormal(0, 0.5, count) * (step / DAY)
+        volumes[-1] *= rng.choice([1.0, 1.0, 1.0, 2.5])
+        return times, closes, volumes
+
+# === HTTP handler ===
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeMarket/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        if status == 200:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            headers = {**(headers or {}), "ETag": etag}
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server.fake
+        fake.requests += 1
+        if fake.latency or fake.jitter: time.sleep(fake.latency + random.uniform(0, fake.jitter))
+        if fake.rate_429 and random.random() < fake.rate_429:
+            fake.throttled += 1
+            return self._send({"error": "rate limited"}, 429, {"Retry-After": str(fake.retry_after)})
+        url = urlparse(self.path)
+        q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try: payload = fake.route(url.path, q)
+        except Exception as e: return self._send({"error": str(e)}, 400)
+        if payload is None: return self._send({"error": "not found"}, 404)
+        self._send(payload)
+
+# === Server ===
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+class FakeMarketServer:
+    def __init__(self, n_coins: int = 1000, latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0,
+                 retry_after: int = 1, host: str = "127.0.0.1", port: int = 0):
+        self.universe = Universe(n_coins)
+        self.latency, self.jitter, self.rate_429, self.retry_after = latency, jitter, rate_429, retry_after
+        self.requests = self.throttled = 0
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """Environment overrides that point config.*_API_BASE at this server."""
+        return {name: self.url + prefix for name, prefix in ENV_PREFIXES.items()}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-market-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- routes ---
+    def route(self, path: str, q: dict):
+        u = self.universe
+        parts = path.strip("/").split("/")
+        provider, rest = parts[0], "/".join(parts[1:])
+        if provider == "cmc" and rest == "data-api/v3/cryptocurrency/listing":
+            start, limit = int(q.get("start", 1)), int(q.get("limit", 100))
+            return {"data": {"totalCount": u.n, "cryptoCurrencyList": u.listing(start, limit)}}
+        if provider == "binance":
+            if rest == "api/v3/exchangeInfo":
+                return {"symbols": [{"symbol": f"{u.symbol(i)}USDT"} for i in range(1, u.n + 1) if i % 10 <= 5]}
+            if rest == "api/v3/klines":
+                i = u.index(q["symbol"])
+                if i is None or i % 10 > 5: return None
+                step = {"1d": DAY, "4h": 14400, "1h": 3600, "15m": 900, "5m": 300}[q.get("interval", "1d")]
+                limit = min(int(q.get("limit", 500)), 1000)
+                times, closes, volumes = u.candles(i, step, HISTORY_DAYS * DAY // step if step == DAY else 1000)
+                keep = times >= int(q["startTime"]) // 1000 if "startTime" in q else np.ones(len(times), bool)
+                sel = np.flatnonzero(keep)
+                sel = sel[:limit] if "startTime" in q else sel[-limit:]
+                return [[int(times[j]) * 1000, "0", "0", "0", f"{closes[j]:.8f}", f"{volumes[j]:.4f}", (int(times[j]) + step) * 1000 - 1, "0", 0, "0", "0", "0"] for j in sel]
+        if provider == "coingecko":
+            if rest == "api/v3/coins/list":
+                return [{"id": f"coin-{i}", "symbol": u.symbol(i).lower(), "name": f"Coin {i}"} for i in range(1, u.n + 1) if i % 10 in (6, 7)]
+            if len(parts) == 6 and parts[1:4] == ["api", "v3", "coins"]:
+                i = u.index(parts[4].removeprefix("coin-"))
+                if i is None: return None
+                days = int(q.get("days", 30))
+                times, closes, volumes = u.candles(i, DAY, days + 1)
+                if parts[5] == "ohlc":  # like CoinGecko: 4-day candles beyond 30 days
+                    stride = 1 if days <= 30 else 4
+                    return [[int(t) * 1000, c, c, c, c] for t, c in zip(times[::-1][::stride][::-1], closes[::-1][::stride][::-1])]
+                if parts[5] == "market_chart": return {"prices": [[int(t) * 1000, c] for t, c in zip(times, closes)],
+                                                       "total_volumes": [[int(t) * 1000, v * c] for t, c, v in zip(times, closes, volumes)]}
+        if provider == "coinpaprika":
+            if rest == "v1/coins":
+                return [{"id": f"c{i}-coin-{i}", "symbol": u.symbol(i), "name": f"Coin {i}", "is_active": True} for i in range(1, u.n + 1) if i % 10 in (6, 7, 8)]
+            if len(parts) == 5 and parts[1:3] == ["v1", "tickers"] and parts[4] == "historical":
+                i = u.index(parts[3].split("-")[0])
+                if i is None: return None
+                start = int(datetime.strptime(q["start"], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+                times, closes, volumes = u.candles(i, DAY, HISTORY_DAYS)
+                sel = np.flatnonzero(times >= start)[:int(q.get("limit", 1000))]
+                return [{"timestamp": datetime.fromtimestamp(int(times[j]), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                         "price": closes[j], "volume_24h": volumes[j] * closes[j], "market_cap": float(u.market_cap[i - 1])} for j in sel]
+        if provider == "coinbase" and len(parts) == 4 and parts[1] == "products" and parts[3] == "candles":
+            i = u.index(parts[2])
+            if i is None or i % 10 not in (0, 9): return None
+            step = int(q.get("granularity", DAY))
+            times, closes, volumes = u.candles(i, step, HISTORY_DAYS * DAY // step if step == DAY else 1000)
+            keep = np.ones(len(times), bool)
+            if "start" in q: keep &= times >= int(datetime.fromisoformat(q["start"]).timestamp())
+            if "end" in q: keep &= times <= int(datetime.fromisoformat(q["end"]).timestamp())
+            sel = np.flatnonzero(keep)[-300:]
+            return [[int(times[j]), 0, 0, 0, closes[j], volumes[j]] for j in sel[::-1]]
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--coins", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of answering 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = FakeMarketServer(args.coins, args.latency_ms / 1000, args.jitter_ms / 1000, args.rate_429, args.retry_after, port=args.port)
+    for name, value in server.env().items(): print(f"export {name}={value}")
+    try: server._httpd.serve_forever()
+    except KeyboardInterrupt: pass
+
+if __name__ == "__main__":
+    main()
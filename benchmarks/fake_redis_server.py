@@ -0,0 +1,127 @@
+# benchmarks/fake_redis_server.py
+"""Minimal in-memory Redis stand-in for exercising the shared cache's Redis backend offline.
+
+Understands the commands the backend and redis-py's handshake use: HELLO, PING, GET, SET [EX|PX] [NX|XX],
+DEL, EXISTS, SCAN (single pass), FLUSHDB, SELECT and CLIENT, over RESP2 or (after HELLO 3) RESP3.
+
+    python benchmarks/fake_redis_server.py --port 6390
+    SHARED_CACHE_URL=redis://127.0.0.1:6390/0 streamlit run altcoin_screener_streamlit.py
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+# === RESP handler ===
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self) -> list[bytes] | None:
+        line = self.rfile.readline()
+        if not line: return None
+        if not line.startswith(b"*"): return line.split()  # inline command (e.g. from telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        resp3 = False
+        while True:
+            cmd = self._read_command()
+            if cmd is None: return
+            if not cmd: continue
+            if cmd[0].upper() == b"HELLO": resp3 = cmd[1:2] == [b"3"]
+            self.wfile.write(self.server.fake.execute(cmd, resp3))
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def _bulk(value: bytes | None, resp3: bool = False) -> bytes:
+    if value is None: return b"_\r\n" if resp3 else b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+# === Server ===
+class FakeRedisServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._data: dict[bytes, tuple[bytes, float | None]] = {}
+        self._lock = threading.Lock()
+        self.commands = 0
+        self._tcp = _Server((host, port), _Handler)
+        self._tcp.fake = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._tcp.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._tcp.serve_forever, name="fake-redis-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._tcp.shutdown()
+        self._tcp.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _live(self, key: bytes) -> bytes | None:
+        item = self._data.get(key)
+        if item is None: return None
+        if item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            return None
+        return item[0]
+
+    def execute(self, cmd: list[bytes], resp3: bool = False) -> bytes:
+        name, args = cmd[0].upper(), cmd[1:]
+        with self._lock:
+            self.commands += 1
+            if name == b"PING": return b"+PONG\r\n"
+            if name in (b"SELECT", b"CLIENT"): return b"+OK\r\n"
+            if name == b"HELLO":
+                if not resp3: return b"*6\r\n+server\r\n+fake-redis\r\n+proto\r\n:2\r\n+mode\r\n+standalone\r\n"
+                return b"%3\r\n+server\r\n+fake-redis\r\n+proto\r\n:3\r\n+mode\r\n+standalone\r\n"
+            if name == b"GET": return _bulk(self._live(args[0]), resp3)
+            if name == b"EXISTS": return b":%d\r\n" % sum(self._live(k) is not None for k in args)
+            if name == b"DEL":
+                n = sum(self._live(k) is not None for k in args)
+                for k in args: self._data.pop(k, None)
+                return b":%d\r\n" % n
+            if name == b"SCAN":
+                opts = [a.upper() for a in args]
+                pattern = args[opts.index(b"MATCH") + 1] if b"MATCH" in opts else b"*"
+                keys = [k for k in list(self._data) if self._live(k) is not None and fnmatch.fnmatchcase(k, pattern)]
+                return b"*2\r\n$1\r\n0\r\n*%d\r\n%s" % (len(keys), b"".join(_bulk(k) for k in keys))
+            if name == b"FLUSHDB":
+                self._data.clear()
+                return b"+OK\r\n"
+            if name == b"SET":
+                key, value, opts, expires = args[0], args[1], [a.upper() for a in args[2:]], None
+                for flag, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+                    if flag in opts: expires = time.time() + float(args[2 + opts.index(flag) + 1]) * scale
+                exists = self._live(key) is not None
+                if (b"NX" in opts and exists) or (b"XX" in opts and not exists): return _bulk(None, resp3)
+                self._data[key] = (value, expires)
+                return b"+OK\r\n"
+            return b"-ERR unknown command '%s'\r\n" % name.lower()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    server = FakeRedisServer(port=args.port)
+    print(f"export SHARED_CACHE_URL={server.url}")
+    try: server._tcp.serve_forever()
+    except KeyboardInterrupt: pass
+
+if __name__ == "__main__":
+    main()
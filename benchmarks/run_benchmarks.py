@@ -0,0 +1,151 @@
+# benchmarks/run_benchmarks.py
+"""Offline end-to-end timings against benchmarks/fake_market_server.py.
+
+Times the listing fetch (load_or_fetch_data), process_dataframe, the preset filter, get_ohlcv,
+analyze_with_rhythmic and the intraday rescore at several universe sizes and writes the results as
+JSON. Pass --compare to diff against an earlier run; the exit code is 1 when a stage regressed
+beyond --threshold.
+
+    python benchmarks/run_benchmarks.py --sizes 100 1000 10000 --latency-ms 20
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_market_server import FakeMarketServer, Universe
+
+PROVIDERS = ["BINANCE", "COINGECKO", "COINPAPRIKA", "COINBASE"]
+
+def _git_commit() -> str | None:
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+class Recorder:
+    def __init__(self, server):
+        self.server = server
+        self.results = []
+
+    def time(self, stage: str, n: int, fn, repeat: int = 1, **extra):
+        """Run `fn` `repeat` times and record the fastest run plus the upstream requests it made."""
+        best, value, requests0, throttled0 = None, None, self.server.requests, self.server.throttled
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            value = fn()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        row = {"stage": stage, "n": n, "seconds": round(best, 6), "requests": (self.server.requests - requests0) // repeat,
+               "throttled": (self.server.throttled - throttled0) // repeat, **extra}
+        self.results.append(row)
+        print(f"{stage:<28} n={n:<6} {best:9.4f}s  requests={row['requests']:<6} throttled={row['throttled']}", file=sys.stderr)
+        return value
+
+def run(args) -> dict:
+    server = FakeMarketServer(max(args.sizes), args.latency_ms / 1000, args.jitter_ms / 1000, args.rate_429, args.retry_after).start()
+    data_dir = tempfile.mkdtemp(prefix="screener-bench-")
+    os.environ.update(server.env())
+    os.environ["SCREENER_DATA_DIR"] = data_dir
+    if not args.keep_limits:
+        for p in PROVIDERS:
+            os.environ.setdefault(f"{p}_RATE_PER_SEC", "10000"); os.environ.setdefault(f"{p}_MAX_CONCURRENCY", "64")
+        os.environ.setdefault("CMC_RATE_PER_SEC", "10000")
+
+    # Imported late so config picks up the overrides above.
+    import rhythmic_analyzer as ra
+    from candle_store import candle_store
+    from shared_cache import shared_cache
+    from filter_engine import RangeFilterEngine
+    from market_listing import ListingStore, PRESETS, process_dataframe, compact_listing, volume_mc_ratio, filter_listing
+
+    rec = Recorder(server)
+    try:
+        for n in args.sizes:
+            server.universe = Universe(n)
+            rec.time("symbol_maps", n, lambda: [m.refresh() for m in (ra.binance_symbols, ra.coingecko_map, ra.coinpaprika_map)])
+            store = ListingStore(directory=os.path.join(data_dir, f"listing-{n}"))
+            _, raw = rec.time("load_or_fetch_data_cold", n, store.current)
+            rec.time("load_or_fetch_data_warm", n, store.current, repeat=args.repeat)
+            processed = rec.time("process_dataframe", n, lambda: process_dataframe(raw), repeat=args.repeat)
+            compact = rec.time("compact_listing", n, lambda: compact_listing(processed), repeat=args.repeat)
+            processed = processed.assign(volume_mc_ratio=volume_mc_ratio(processed))
+            rec.time("filter_mask", n, lambda: [filter_listing(processed, p) for p in PRESETS.values()], repeat=args.repeat)
+            engine = rec.time("filter_index_build", n, lambda: RangeFilterEngine(compact), repeat=args.repeat)
+            rec.time("filter_index_query", n, lambda: [engine.filter(p) for p in PRESETS.values()], repeat=args.repeat)
+
+            symbols = raw["symbol"].tolist()
+            sample = symbols[:min(n, args.ohlcv_sample)]
+            candle_store.clear(); shared_cache.clear(); ra.get_ohlcv.clear()
+            rec.time("get_ohlcv_cold", n, lambda: [ra.get_ohlcv(s) for s in sample], calls=len(sample))
+            shared_cache.clear(); ra.get_ohlcv.clear()
+            rec.time("get_ohlcv_warm_store", n, lambda: [ra.get_ohlcv(s) for s in sample], calls=len(sample))
+
+            coins = raw[["symbol", "name", "percentChange7d"]].rename(columns={"percentChange7d": "percent_change_7d"}).to_dict("records")
+            candle_store.clear(); shared_cache.clear(); ra.get_ohlcv.clear()
+            rec.time("analyze_with_rhythmic_cold", n, lambda: ra.analyze_with_rhythmic(coins, max_workers=args.workers), coins=len(coins))
+            shared_cache.clear(); ra.get_ohlcv.clear()
+            rec.time("analyze_with_rhythmic_warm", n, lambda: ra.analyze_with_rhythmic(coins, max_workers=args.workers), coins=len(coins))
+
+            intraday = coins[:min(n, args.ohlcv_sample)]
+            candle_store.clear(); ra.reset_intraday_state()
+            rec.time("analyze_intraday_cold", n, lambda: ra.analyze_with_intraday(intraday, interval="1h", max_workers=args.workers), coins=len(intraday))
+            rec.time("analyze_intraday_rescore", n, lambda: ra.analyze_with_intraday(intraday, interval="1h", max_workers=args.workers), repeat=args.repeat, coins=len(intraday))
+    finally:
+        server.stop()
+    return {"meta": {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(), "python": platform.python_version(),
+                     "machine": platform.machine(), "sizes": args.sizes, "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                     "rate_429": args.rate_429, "workers": args.workers, "keep_limits": args.keep_limits},
+            "results": rec.results}
+
+def compare(current: dict, baseline: dict, threshold: float, min_seconds: float) -> list:
+    """Print per-stage ratios against `baseline`; return the rows slower than (1 + threshold)."""
+    base = {(r["stage"], r["n"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    print(f"{'stage':<28} {'n':>6} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for r in current["results"]:
+        old = base.get((r["stage"], r["n"]))
+        if old is None: continue
+        ratio = r["seconds"] / old if old else float("inf")
+        flag = ratio > 1 + threshold and r["seconds"] >= min_seconds
+        if flag: regressions.append({**r, "baseline_seconds": old, "ratio": ratio})
+        print(f"{r['stage']:<28} {r['n']:>6} {old:>10.4f} {r['seconds']:>10.4f} {ratio:>7.2f}{'  REGRESSION' if flag else ''}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline screener benchmarks against a local fake market-data server.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--ohlcv-sample", type=int, default=200, help="symbols timed in the get_ohlcv stages")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions for CPU-only stages (fastest is kept)")
+    parser.add_argument("--keep-limits", action="store_true", help="keep the configured provider rate limits instead of lifting them")
+    parser.add_argument("--output", default=None, help="defaults to benchmarks/results/bench-<timestamp>.json")
+    parser.add_argument("--compare", default=None, help="baseline JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before a stage counts as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="ignore regressions on stages faster than this")
+    args = parser.parse_args(argv)
+
+    current = run(args)
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f: json.dump(current, f, indent=2)
+    print(f"wrote {output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: baseline = json.load(f)
+        if compare(current, baseline, args.threshold, args.min_seconds): return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
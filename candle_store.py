@@ -0,0 +1,125 @@
+# candle_store.py
+
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+from config import CANDLE_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol   TEXT    NOT NULL,
+    provider TEXT    NOT NULL,
+    interval TEXT    NOT NULL,
+    ts       INTEGER NOT NULL,
+    close    REAL,
+    volume   REAL,
+    PRIMARY KEY (symbol, provider, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fetch_log (
+    symbol     TEXT NOT NULL,
+    provider   TEXT NOT NULL,
+    interval   TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (symbol, provider, interval)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history_log (
+    symbol   TEXT    NOT NULL,
+    provider TEXT    NOT NULL,
+    interval TEXT    NOT NULL,
+    since    INTEGER NOT NULL,
+    PRIMARY KEY (symbol, provider, interval)
+) WITHOUT ROWID
+"""
+_TABLES = ("candles", "fetch_log", "history_log")
+
+# === SQLite-backed OHLCV store ===
+class CandleStore:
+    """On-disk candle history keyed by (symbol, provider, interval), timestamps in unix seconds."""
+
+    def __init__(self, path: str = CANDLE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def last_timestamp(self, symbol: str, provider: str, interval: str = "1d") -> int | None:
+        row = self._conn().execute(
+            "SELECT MAX(ts) FROM candles WHERE symbol=? AND provider=? AND interval=?",
+            (symbol.upper(), provider, interval)).fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def upsert(self, symbol: str, provider: str, times, closes, volumes, interval: str = "1d") -> int:
+        rows = [(symbol.upper(), provider, interval, int(t), float(c), float(v)) for t, c, v in zip(times, closes, volumes)]
+        if not rows: return 0
+        with self._conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def mark_fetched(self, symbol: str, provider: str, interval: str = "1d", at: float | None = None):
+        """Record that the provider was just asked for this series (even if it had no new candles)."""
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO fetch_log VALUES (?, ?, ?, ?)",
+                         (symbol.upper(), provider, interval, time.time() if at is None else at))
+
+    def fetched_at(self, symbol: str, provider: str, interval: str = "1d") -> float | None:
+        row = self._conn().execute(
+            "SELECT fetched_at FROM fetch_log WHERE symbol=? AND provider=? AND interval=?",
+            (symbol.upper(), provider, interval)).fetchone()
+        return row[0] if row else None
+
+    def mark_history(self, symbol: str, provider: str, since: int, interval: str = "1d"):
+        """Record that the provider was asked for this series' whole history back to `since` (it may have had less)."""
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO history_log VALUES (?, ?, ?, ?)", (symbol.upper(), provider, interval, int(since)))
+
+    def history_since(self, symbol: str, provider: str, interval: str = "1d") -> int | None:
+        row = self._conn().execute(
+            "SELECT since FROM history_log WHERE symbol=? AND provider=? AND interval=?",
+            (symbol.upper(), provider, interval)).fetchone()
+        return row[0] if row else None
+
+    def read(self, symbol: str, provider: str, limit: int, interval: str = "1d", since: int | None = None) -> dict:
+        """Return the latest `limit` candles (only those after `since`, if given) in ascending time order as typed arrays."""
+        rows = self._conn().execute(
+            "SELECT ts, close, volume FROM candles WHERE symbol=? AND provider=? AND interval=? AND ts>? ORDER BY ts DESC LIMIT ?",
+            (symbol.upper(), provider, interval, -1 if since is None else int(since), int(limit))).fetchall()
+        rows.reverse()
+        arr = np.array(rows, dtype=float).reshape(-1, 3)
+        return {"times": arr[:, 0].astype(np.int64), "closes": arr[:, 1], "volumes": arr[:, 2]}
+
+    def history(self, interval: str = "1d", since: int | None = None) -> pd.DataFrame:
+        """Every stored candle for `interval` (optionally only ts > since) as one frame: symbol, provider, ts, close, volume."""
+        return pd.read_sql_query(
+            "SELECT symbol, provider, ts, close, volume FROM candles WHERE interval=? AND ts>?",
+            self._conn(), params=(interval, -1 if since is None else int(since)))
+
+    def delete_series(self, symbol: str, provider: str, interval: str = "1d"):
+        with self._conn() as conn:
+            for table in _TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE symbol=? AND provider=? AND interval=?", (symbol.upper(), provider, interval))
+
+    def count(self, symbol: str, provider: str, interval: str = "1d") -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM candles WHERE symbol=? AND provider=? AND interval=?",
+                                    (symbol.upper(), provider, interval)).fetchone()[0]
+
+    def clear(self, provider: str | None = None):
+        with self._conn() as conn:
+            for table in _TABLES:
+                if provider is None: conn.execute(f"DELETE FROM {table}")
+                else: conn.execute(f"DELETE FROM {table} WHERE provider=?", (provider,))
+
+candle_store = CandleStore()
@@ -0,0 +1,81 @@
+# config.py
+
+import os
+
+def _env_float(name: str, default: float) -> float:
+    try: return float(os.environ.get(name, default))
+    except ValueError: return default
+
+def _env_int(name: str, default: int) -> int:
+    try: return int(os.environ.get(name, default))
+    except ValueError: return default
+
+# === API base URLs (overridable, e.g. to point at benchmarks/fake_market_server.py) ===
+CMC_API_BASE = os.environ.get("CMC_API_BASE", "https://api.coinmarketcap.com")
+BINANCE_API_BASE = os.environ.get("BINANCE_API_BASE", "https://api.binance.com")
+COINGECKO_API_BASE = os.environ.get("COINGECKO_API_BASE", "https://api.coingecko.com")
+COINPAPRIKA_API_BASE = os.environ.get("COINPAPRIKA_API_BASE", "https://api.coinpaprika.com")
+COINBASE_API_BASE = os.environ.get("COINBASE_API_BASE", "https://api.exchange.coinbase.com")
+
+# === CoinMarketCap listing fetch ===
+CMC_MAX_WORKERS = _env_int("CMC_MAX_WORKERS", 8)
+CMC_RATE_PER_SEC = _env_float("CMC_RATE_PER_SEC", 10.0)
+CMC_RATE_BURST = _env_int("CMC_RATE_BURST", 10)
+CMC_MAX_COINS = _env_int("CMC_MAX_COINS", 10000)
+
+# === OHLCV providers (per-provider concurrency and requests-per-second budgets) ===
+OHLCV_MAX_WORKERS = _env_int("OHLCV_MAX_WORKERS", 16)
+PROVIDER_LIMITS = {
+    "binance": {"max_concurrency": _env_int("BINANCE_MAX_CONCURRENCY", 10), "rate_per_sec": _env_float("BINANCE_RATE_PER_SEC", 15.0)},
+    "coingecko": {"max_concurrency": _env_int("COINGECKO_MAX_CONCURRENCY", 2), "rate_per_sec": _env_float("COINGECKO_RATE_PER_SEC", 0.5)},
+    "coinpaprika": {"max_concurrency": _env_int("COINPAPRIKA_MAX_CONCURRENCY", 4), "rate_per_sec": _env_float("COINPAPRIKA_RATE_PER_SEC", 3.0)},
+    "coinbase": {"max_concurrency": _env_int("COINBASE_MAX_CONCURRENCY", 5), "rate_per_sec": _env_float("COINBASE_RATE_PER_SEC", 8.0)},
+}
+
+# === Local storage ===
+DATA_DIR = os.environ.get("SCREENER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+CANDLE_DB_PATH = os.environ.get("CANDLE_DB_PATH", os.path.join(DATA_DIR, "candles.sqlite"))
+SYMBOL_SNAPSHOT_DIR = os.environ.get("SYMBOL_SNAPSHOT_DIR", os.path.join(DATA_DIR, "symbols"))
+SYMBOL_MAP_TTL = _env_int("SYMBOL_MAP_TTL", 86400)
+
+# === Market listing snapshots (top N by market cap refreshed often, the long tail rarely) ===
+LISTING_SNAPSHOT_DIR = os.environ.get("LISTING_SNAPSHOT_DIR", os.path.join(DATA_DIR, "listing"))
+LISTING_HEAD_SIZE = _env_int("LISTING_HEAD_SIZE", 500)
+LISTING_HEAD_TTL = _env_int("LISTING_HEAD_TTL", 900)
+LISTING_FULL_TTL = _env_int("LISTING_FULL_TTL", 14400)
+LISTING_KEEP_SNAPSHOTS = _env_int("LISTING_KEEP_SNAPSHOTS", 3)
+
+# === Metrics ===
+METRICS_PORT = _env_int("METRICS_PORT", 0)
+
+# === Shared HTTP transport ===
+HTTP_CONNECT_TIMEOUT = _env_float("HTTP_CONNECT_TIMEOUT", 5.0)
+HTTP_READ_TIMEOUT = _env_float("HTTP_READ_TIMEOUT", 20.0)
+HTTP_MAX_RETRIES = _env_int("HTTP_MAX_RETRIES", 4)
+HTTP_BACKOFF_BASE = _env_float("HTTP_BACKOFF_BASE", 0.5)
+HTTP_BACKOFF_MAX = _env_float("HTTP_BACKOFF_MAX", 30.0)
+HTTP_POOL_MAXSIZE = _env_int("HTTP_POOL_MAXSIZE", 32)
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", os.path.join(DATA_DIR, "http_cache"))
+
+# === Hedged OHLCV lookup ===
+OHLCV_HEDGED = os.environ.get("OHLCV_HEDGED", "1").lower() not in ("0", "false", "no")
+HEDGE_LATENCY_BUDGET = _env_float("HEDGE_LATENCY_BUDGET", 0.8)
+HEDGE_MAX_WORKERS = _env_int("HEDGE_MAX_WORKERS", 32)
+
+# === Background warm-up ===
+WARMUP_INTERVAL = _env_int("WARMUP_INTERVAL", 900)  # seconds between warm-up passes; 0 disables the in-app scheduler
+WARMUP_MAX_WORKERS = _env_int("WARMUP_MAX_WORKERS", OHLCV_MAX_WORKERS)
+WARMUP_COINBASE = os.environ.get("WARMUP_COINBASE", "1").lower() not in ("0", "false", "no")
+OHLCV_FRESH_TTL = _env_int("OHLCV_FRESH_TTL", 1800)  # candles fetched more recently than this are served without a network call
+
+# === Shared cache (across sessions and replicas) ===
+# "sqlite" (file under DATA_DIR), "sqlite:///path/to/cache.db", "redis://host:6379/0", or "none" (in-process coalescing only)
+SHARED_CACHE_URL = os.environ.get("SHARED_CACHE_URL", "sqlite")
+SHARED_CACHE_LOCK_TTL = _env_int("SHARED_CACHE_LOCK_TTL", 300)  # a crashed holder's lock expires after this many seconds
+SHARED_CACHE_POLL = _env_float("SHARED_CACHE_POLL", 0.05)
+
+# === Intraday rhythm mode ===
+INTRADAY_INTERVAL = os.environ.get("INTRADAY_INTERVAL", "1h")  # "1h" or "15m"
+INTRADAY_CANDLES = _env_int("INTRADAY_CANDLES", 720)  # rolling median window, in candles
+INTRADAY_FRESH_TTL = _env_int("INTRADAY_FRESH_TTL", 120)
+INTRADAY_MAX_STATES = _env_int("INTRADAY_MAX_STATES", 5000)  # rolling VCI states kept in memory (least recently used dropped)
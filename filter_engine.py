@@ -0,0 +1,60 @@
+# filter_engine.py
+
+import numpy as np
+import pandas as pd
+from market_listing import PROCESSED_COLS
+
+# filter_params keys -> (column, bound)
+RANGE_PARAMS = {
+    'min_market_cap': (PROCESSED_COLS['market_cap'], 'min'), 'max_market_cap': (PROCESSED_COLS['market_cap'], 'max'),
+    'min_volume_mc': ('volume_mc_ratio', 'min'), 'max_volume_mc': ('volume_mc_ratio', 'max'),
+    'min_change_7d': (PROCESSED_COLS['percent_change_7d'], 'min'), 'max_change_7d': (PROCESSED_COLS['percent_change_7d'], 'max'),
+}
+
+# === Presorted range index ===
+class RangeFilterEngine:
+    """Answers inclusive range filters on a fixed frame by binary search over presorted column indexes.
+
+    Each column keeps (sorted_values, row_positions). A query narrows every column to a contiguous
+    slice with `searchsorted`, walks the smallest slice and keeps the rows whose other columns fall in
+    their ranges. Build once per listing snapshot; `filter` never copies the whole frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns=None):
+        self.df = df
+        columns = columns or sorted({col for col, _ in RANGE_PARAMS.values()})
+        self._values = {col: df[col].to_numpy() for col in columns}
+        self._sorted = {}
+        for col, values in self._values.items():
+            order = np.argsort(values, kind="stable")
+            self._sorted[col] = (values[order], order)
+
+    def positions(self, ranges: dict) -> np.ndarray:
+        """Row positions (ascending) whose values lie in every `{column: (lo, hi)}` range; None bounds are open."""
+        if not ranges: return np.arange(len(self.df))
+        spans = []
+        for col, (lo, hi) in ranges.items():
+            sorted_values, order = self._sorted[col]
+            start = 0 if lo is None else np.searchsorted(sorted_values, lo, side="left")
+            stop = len(sorted_values) if hi is None else np.searchsorted(sorted_values, hi, side="right")
+            spans.append((max(0, stop - start), col, start, stop))
+        spans.sort(key=lambda span: span[0])
+        _, col, start, stop = spans[0]
+        candidates = self._sorted[col][1][start:stop]
+        for _, col, _, _ in spans[1:]:
+            lo, hi = ranges[col]
+            values = self._values[col][candidates]
+            keep = np.ones(len(candidates), dtype=bool)
+            if lo is not None: keep &= values >= lo
+            if hi is not None: keep &= values <= hi
+            candidates = candidates[keep]
+        return np.sort(candidates)
+
+    def filter(self, filter_params: dict) -> pd.DataFrame:
+        """Equivalent to market_listing.filter_listing(self.df, filter_params)."""
+        ranges = {}
+        for key, value in filter_params.items():
+            col, bound = RANGE_PARAMS[key]
+            lo, hi = ranges.get(col, (None, None))
+            ranges[col] = (value, hi) if bound == 'min' else (lo, value)
+        return self.df.iloc[self.positions(ranges)]
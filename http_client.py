@@ -0,0 +1,148 @@
+# http_client.py
+
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from config import (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX,
+                    HTTP_POOL_MAXSIZE, HTTP_CACHE_DIR)
+from metrics import metrics, track_request
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def retry_after_seconds(response) -> float | None:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value: return None
+    try: return max(0.0, float(value))
+    except ValueError: pass
+    try: return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError): return None
+
+# === Per-thread request tally ===
+# Time on the wire (gate waits and backoff sleeps excluded) and failed requests, per calling thread, so a
+# caller can score a whole provider lookup by the deltas around it.
+_tally = threading.local()
+
+def request_tally() -> tuple[int, float, int]:
+    """(requests, seconds on the wire, failed requests) issued by the current thread so far."""
+    return getattr(_tally, "requests", 0), getattr(_tally, "seconds", 0.0), getattr(_tally, "failures", 0)
+
+def _count(seconds: float = 0.0, n: int = 0, failed: int = 0):
+    requests_, total, failures = request_tally()
+    _tally.requests, _tally.seconds, _tally.failures = requests_ + n, total + seconds, failures + failed
+
+def tallied(fn, *args, **kwargs):
+    """Run fn and return (result, error, tally delta); lets a helper thread hand its requests back to the caller."""
+    before = request_tally()
+    try: result, error = fn(*args, **kwargs), None
+    except Exception as e: result, error = None, e
+    return result, error, tuple(after - b for after, b in zip(request_tally(), before))
+
+def add_tally(delta: tuple[int, float, int]):
+    """Credit a delta from `tallied` to the current thread."""
+    n, seconds, failures = delta
+    _count(seconds, n, failures)
+
+# === On-disk validator cache for conditional requests ===
+class RevalidationCache:
+    """Stores the last 200 body per URL with its ETag/Last-Modified so it can be re-sent on a 304."""
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".json.gz")
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, response):
+        etag, modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if not etag and not modified: return
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {"etag": etag, "last_modified": modified, "content_type": response.headers.get("Content-Type"),
+                 "encoding": response.encoding, "body": response.content.decode(response.encoding or "utf-8", errors="replace")}
+        tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f: json.dump(entry, f)
+        os.replace(tmp, self._path(key))
+
+    @staticmethod
+    def to_response(entry: dict, url: str) -> requests.Response:
+        r = requests.Response()
+        r.status_code, r.url, r.encoding = 200, url, entry.get("encoding") or "utf-8"
+        r._content = entry["body"].encode(r.encoding)
+        r.headers["Content-Type"] = entry.get("content_type") or "application/json"
+        r.headers["X-Revalidated"] = "1"
+        return r
+
+# === Pooled client ===
+class HttpClient:
+    """One keep-alive session shared by every caller.
+
+    Per-host connection pools, default timeouts, gzip, retries with jittered exponential backoff
+    that honours Retry-After on 429/5xx, and optional ETag/If-Modified-Since revalidation.
+    """
+
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_base: float = HTTP_BACKOFF_BASE, backoff_max: float = HTTP_BACKOFF_MAX,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE, cache: RevalidationCache | None = None):
+        self.timeout, self.max_retries = timeout, max_retries
+        self.backoff_base, self.backoff_max = backoff_base, backoff_max
+        self.cache = cache or RevalidationCache()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json", "User-Agent": "crypto-screener/1.0"})
+
+    def backoff(self, attempt: int, response=None) -> float:
+        retry_after = retry_after_seconds(response) if response is not None else None
+        if retry_after is not None: return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str, params=None, provider: str = "http", gate=None, revalidate: bool = False, timeout=None) -> requests.Response:
+        """GET `url`; returns the last response (callers still check status) or raises the last transport error."""
+        key = url + "?" + json.dumps(sorted((params or {}).items()), default=str)
+        cached = self.cache.get(key) if revalidate else None
+        headers = {}
+        if cached and cached.get("etag"): headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"): headers["If-Modified-Since"] = cached["last_modified"]
+        for attempt in range(self.max_retries + 1):
+            try:
+                with (gate or nullcontext()), track_request(provider) as record:
+                    t0 = time.perf_counter()
+                    try: r = record(self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout))
+                    finally: _count(time.perf_counter() - t0, n=1)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    _count(failed=True)
+                    raise
+                metrics.inc("provider_retries_total", provider=provider)
+                time.sleep(self.backoff(attempt))
+                continue
+            if r.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                metrics.inc("provider_retries_total", provider=provider)
+                time.sleep(self.backoff(attempt, r))
+                continue
+            if r.status_code in RETRY_STATUSES: _count(failed=True)  # retries exhausted
+            if r.status_code == 304 and cached:
+                metrics.inc("cache_hits_total", provider=provider, layer="revalidation")
+                return self.cache.to_response(cached, url)
+            if revalidate and r.status_code == 200:
+                metrics.inc("cache_misses_total", provider=provider, layer="revalidation")
+                self.cache.put(key, r)
+            return r
+        return r
+
+http = HttpClient()
@@ -0,0 +1,193 @@
+# market_listing.py
+
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from config import (CMC_API_BASE, CMC_MAX_WORKERS, CMC_RATE_PER_SEC, CMC_RATE_BURST, CMC_MAX_COINS,
+                    LISTING_SNAPSHOT_DIR, LISTING_HEAD_SIZE, LISTING_HEAD_TTL, LISTING_FULL_TTL, LISTING_KEEP_SNAPSHOTS)
+from rate_limiter import TokenBucket
+from metrics import metrics
+from http_client import http
+
+# === CoinMarketCap listing API ===
+API_URL, PER_PAGE = f"{CMC_API_BASE}/data-api/v3/cryptocurrency/listing", 100
+LISTING_COLUMNS = ['id', 'symbol', 'name', 'price', 'volume24h', 'marketCap', 'percentChange7d']
+
+# one bucket for every CMC request; passed as the client's gate so each retry attempt is rate-limited too
+cmc_limiter = TokenBucket(CMC_RATE_PER_SEC, CMC_RATE_BURST)
+
+def cmc_get(params: dict):
+    return http.get(API_URL, params=params, provider="coinmarketcap", gate=cmc_limiter)
+
+def fetch_total_coins() -> int:
+    r = cmc_get({'start': 1, 'limit': 1}); r.raise_for_status(); return int(r.json()['data']['totalCount'])
+
+def fetch_page(start=1, limit=PER_PAGE) -> list:
+    params = {'start': start, 'limit': limit, 'sortBy': 'market_cap', 'sortType': 'desc'}; r = cmc_get(params); r.raise_for_status(); return r.json()['data']['cryptoCurrencyList']
+
+def parse_coin(c: dict) -> dict:
+    q = c.get('quotes', [{}])[0]
+    return {'id': c.get('id'), 'symbol': c.get('symbol'), 'name': c.get('name'), 'price': q.get('price', None), 'volume24h': q.get('volume24h', None), 'marketCap': q.get('marketCap', None), 'percentChange7d': q.get('percentChange7d', None)}
+
+def iter_listing_pages(max_coins: int | None = None):
+    """Yield (start, parsed_rows) for each listing page as soon as it arrives, using concurrent, rate-limited requests (retried by the HTTP client)."""
+    fetch_limit = min(fetch_total_coins(), CMC_MAX_COINS if max_coins is None else max_coins)
+    starts = range(1, fetch_limit + 1, PER_PAGE)
+    with ThreadPoolExecutor(max_workers=CMC_MAX_WORKERS) as pool:
+        futures = {pool.submit(fetch_page, start, PER_PAGE): start for start in starts}
+        try:
+            for fut in as_completed(futures):
+                yield futures[fut], [parse_coin(c) for c in fut.result()]
+        finally:
+            for f in futures: f.cancel()
+
+def fetch_listing(max_coins: int | None = None) -> pd.DataFrame:
+    """Fetch the top `max_coins` coins by market cap, reassembled in rank order (stops at the first empty page)."""
+    pages = dict(iter_listing_pages(max_coins))
+    rows = []
+    for start in sorted(pages):
+        if not pages[start]: break
+        rows.extend(pages[start])
+    return pd.DataFrame(rows, columns=LISTING_COLUMNS)
+
+# === Processing and preset filters ===
+RAW_COLS = {'symbol': 'symbol', 'name': 'name', 'price': 'price', 'volume24h': 'volume24h', 'marketCap': 'marketCap', 'percentChange7d': 'percentChange7d'}
+PROCESSED_COLS = {'symbol': 'symbol', 'name': 'name', 'price': 'price', 'volume_24h': 'volume_24h', 'market_cap': 'market_cap', 'percent_change_7d': 'percent_change_7d'}
+RENAME_MAP = {RAW_COLS['volume24h']: PROCESSED_COLS['volume_24h'], RAW_COLS['marketCap']: PROCESSED_COLS['market_cap'], RAW_COLS['percentChange7d']: PROCESSED_COLS['percent_change_7d']}
+NUMERIC_COLS = [PROCESSED_COLS['price'], PROCESSED_COLS['volume_24h'], PROCESSED_COLS['market_cap'], PROCESSED_COLS['percent_change_7d']]
+
+PRESETS = {
+    "Conservative": {'min_market_cap': 50e6, 'max_market_cap': 500e6, 'min_volume_mc': 0.10, 'max_volume_mc': 0.80, 'min_change_7d': -2.0, 'max_change_7d': 12.0},
+    "Balanced": {'min_market_cap': 10e6, 'max_market_cap': 150e6, 'min_volume_mc': 0.20, 'max_volume_mc': 1.00, 'min_change_7d': -2.0, 'max_change_7d': 15.0},
+    "Aggressive": {'min_market_cap': 1e6, 'max_market_cap': 100e6, 'min_volume_mc': 0.30, 'max_volume_mc': 2.00, 'min_change_7d': -8.0, 'max_change_7d': 25.0}
+}
+
+def process_dataframe(df: pd.DataFrame):
+    if df is None or df.empty: return None
+    processed_df = df.copy()
+    processed_df.rename(columns=RENAME_MAP, inplace=True)
+    for col in NUMERIC_COLS: processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce')
+    critical_cols = [PROCESSED_COLS['market_cap'], PROCESSED_COLS['volume_24h']]
+    for col in critical_cols: processed_df[col] = processed_df[col].replace(0, np.nan)
+    processed_df.dropna(subset=NUMERIC_COLS, inplace=True)
+    return processed_df
+
+def compact_listing(df: pd.DataFrame) -> pd.DataFrame:
+    """Processed listing with `volume_mc_ratio`, categorical symbol/name and float32 numerics, for long-lived caching."""
+    compact = df.reset_index(drop=True)
+    compact['volume_mc_ratio'] = volume_mc_ratio(compact)
+    for col in [PROCESSED_COLS['symbol'], PROCESSED_COLS['name']]: compact[col] = compact[col].astype('category')
+    for col in NUMERIC_COLS + ['volume_mc_ratio']: compact[col] = compact[col].astype(np.float32)
+    return compact
+
+def volume_mc_ratio(df: pd.DataFrame) -> pd.Series:
+    return df[PROCESSED_COLS['volume_24h']] / (df[PROCESSED_COLS['market_cap']] + 1e-9)
+
+def filter_listing(df: pd.DataFrame, filter_params: dict) -> pd.DataFrame:
+    """Apply a preset/manual range filter to a processed frame that already has `volume_mc_ratio`."""
+    return df[(df[PROCESSED_COLS['market_cap']] >= filter_params['min_market_cap']) & (df[PROCESSED_COLS['market_cap']] <= filter_params['max_market_cap']) & (df['volume_mc_ratio'] >= filter_params['min_volume_mc']) & (df['volume_mc_ratio'] <= filter_params['max_volume_mc']) & (df[PROCESSED_COLS['percent_change_7d']] >= filter_params['min_change_7d']) & (df[PROCESSED_COLS['percent_change_7d']] <= filter_params['max_change_7d'])]
+
+# === Snapshot persistence with delta refresh ===
+class ListingStore:
+    """Timestamped Parquet snapshots of the listing, refreshed incrementally in the background.
+
+    The top `head_size` coins are re-fetched every `head_ttl` seconds and merged by CMC id into
+    the last snapshot; the full listing is re-fetched every `full_ttl` seconds. Readers always get
+    the last good snapshot; only a cold start (no snapshot on disk) blocks on the network.
+    """
+
+    def __init__(self, directory: str = LISTING_SNAPSHOT_DIR, head_size: int = LISTING_HEAD_SIZE,
+                 head_ttl: int = LISTING_HEAD_TTL, full_ttl: int = LISTING_FULL_TTL, keep: int = LISTING_KEEP_SNAPSHOTS):
+        self.directory = directory
+        self.head_size, self.head_ttl, self.full_ttl, self.keep = head_size, head_ttl, full_ttl, keep
+        self.meta_path = os.path.join(directory, "latest.json")
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._cached_path, self._cached_df = None, None
+        self.last_error = None
+
+    # --- metadata and snapshot I/O ---
+    def meta(self) -> dict | None:
+        try:
+            with open(self.meta_path, encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read(self, path: str) -> pd.DataFrame:
+        with self._lock:
+            if path != self._cached_path:
+                self._cached_df, self._cached_path = pd.read_parquet(path), path
+            return self._cached_df
+
+    def _write(self, df: pd.DataFrame, head_refreshed_at: float, full_refreshed_at: float) -> dict:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"listing-{int(time.time() * 1000)}.parquet")
+        df.to_parquet(path, index=False)
+        meta = {"path": path, "rows": len(df), "head_refreshed_at": head_refreshed_at, "full_refreshed_at": full_refreshed_at}
+        tmp = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+        for old in sorted(glob.glob(os.path.join(self.directory, "listing-*.parquet")))[:-self.keep]:
+            try: os.remove(old)
+            except OSError: pass
+        return meta
+
+    # --- refresh ---
+    def refresh(self, full: bool = False) -> dict:
+        """Fetch the head (or the full listing) now and publish a new snapshot.
+
+        A caller that waited on another refresh returns that one's snapshot instead of crawling again.
+        """
+        seen = self.meta()
+        stamp = "full_refreshed_at" if full else "head_refreshed_at"
+        with self._refresh_lock:
+            meta, now = self.meta(), time.time()
+            if meta is not None and (seen is None or meta[stamp] > seen[stamp]): return meta
+            if full or meta is None:
+                with metrics.span("listing_refresh_full"):
+                    return self._write(fetch_listing(), now, now)
+            with metrics.span("listing_refresh_head"):
+                head = fetch_listing(self.head_size)
+            old = self._read(meta["path"])
+            merged = pd.concat([head, old[~old["id"].isin(head["id"])]], ignore_index=True)
+            merged = merged.sort_values("marketCap", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+            return self._write(merged, now, meta["full_refreshed_at"])
+
+    def _refresh_quietly(self, full: bool):
+        try:
+            self.refresh(full)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+
+    def refresh_async(self, full: bool = False) -> bool:
+        """Start a background refresh unless one is already running."""
+        if self._refresh_lock.locked(): return False
+        threading.Thread(target=self._refresh_quietly, args=(full,), name="listing-refresh", daemon=True).start()
+        return True
+
+    def is_refreshing(self) -> bool:
+        return self._refresh_lock.locked()
+
+    # --- readers ---
+    def current(self) -> tuple[str, pd.DataFrame]:
+        """Return (snapshot_path, listing) for the last good snapshot, scheduling a delta refresh if it is stale."""
+        meta = self.meta()
+        if meta is None or not os.path.exists(meta["path"]):
+            meta = self.refresh(full=True)
+        else:
+            age_head, age_full = time.time() - meta["head_refreshed_at"], time.time() - meta["full_refreshed_at"]
+            if age_full > self.full_ttl: self.refresh_async(full=True)
+            elif age_head > self.head_ttl: self.refresh_async(full=False)
+        return meta["path"], self._read(meta["path"]).drop(columns=["id"])
+
+    def load(self) -> pd.DataFrame:
+        """Return the last good listing (without the id column), scheduling a delta refresh if it is stale."""
+        return self.current()[1]
+
+listing_store = ListingStore()
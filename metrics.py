@@ -0,0 +1,182 @@
+# metrics.py
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# === Histogram ===
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        i = next((k for k, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Bucket-interpolated estimate, like Prometheus' histogram_quantile."""
+        if not self.count: return None
+        rank, seen, lower = q * self.count, 0, 0.0
+        for k, c in enumerate(self.counts):
+            upper = self.buckets[k] if k < len(self.buckets) else self.buckets[-1]
+            if c and seen + c >= rank:
+                return lower + (upper - lower) * (rank - seen) / c
+            seen, lower = seen + c, upper
+        return self.buckets[-1]
+
+# === Registry ===
+class MetricsRegistry:
+    """Process-wide counters, latency histograms and stage timings with JSON and Prometheus text export."""
+
+    def __init__(self, namespace: str = "screener"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters: dict[tuple, float] = {}
+            self._histograms: dict[tuple, Histogram] = {}
+            self._last_span: dict[str, float] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None: hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time a pipeline stage; keeps its histogram and the most recent duration."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.observe("stage_seconds", elapsed, stage=stage)
+            with self._lock: self._last_span[stage] = elapsed
+
+    # --- views ---
+    def counter(self, name: str, **labels) -> float:
+        return self._counters.get(self._key(name, labels), 0)
+
+    def last_spans(self) -> dict:
+        with self._lock: return dict(self._last_span)
+
+    def provider_summary(self) -> list[dict]:
+        """One row per provider: requests, errors, 429s, cache hits/misses, fallbacks and latency quantiles."""
+        with self._lock:
+            providers = sorted({dict(labels).get("provider") for (_, labels) in list(self._counters) + list(self._histograms)} - {None})
+            rows = []
+            for p in providers:
+                def total(name):
+                    return sum(v for (n, labels), v in self._counters.items() if n == name and dict(labels).get("provider") == p)
+                hist = self._histograms.get(self._key("provider_request_seconds", {"provider": p}))
+                rows.append({"provider": p, "requests": total("provider_requests_total"), "errors": total("provider_errors_total"),
+                             "throttled_429": total("provider_throttled_total"), "cache_hits": total("cache_hits_total"),
+                             "cache_misses": total("cache_misses_total"), "fallbacks": total("ohlcv_fallback_total"),
+                             "p50_ms": round(hist.quantile(0.5) * 1000, 1) if hist and hist.count else None,
+                             "p95_ms": round(hist.quantile(0.95) * 1000, 1) if hist and hist.count else None})
+            return rows
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._counters.items())],
+                "histograms": [{"name": n, "labels": dict(l), "count": h.count, "sum": h.sum, "buckets": dict(zip(map(str, h.buckets), h.counts)),
+                                "p50": h.quantile(0.5), "p95": h.quantile(0.95)} for (n, l), h in sorted(self._histograms.items())],
+                "last_spans": dict(self._last_span),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items: return ""
+            return "{" + ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in items) + "}"
+        lines, typed = [], set()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{self.namespace}_{name}"
+                if metric not in typed: lines.append(f"# TYPE {metric} counter"); typed.add(metric)
+                lines.append(f"{metric}{fmt(labels)} {value}")
+            for (name, labels), hist in sorted(self._histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                if metric not in typed: lines.append(f"# TYPE {metric} histogram"); typed.add(metric)
+                cumulative = 0
+                for bound, c in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                    cumulative += c
+                    lines.append(f"{metric}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{metric}_sum{fmt(labels)} {hist.sum}")
+                lines.append(f"{metric}_count{fmt(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# === Provider call instrumentation ===
+@contextmanager
+def track_request(provider: str):
+    """Count and time one upstream request; call the yielded function with the response to record its status."""
+    t0 = time.perf_counter()
+    def record(response):
+        if response.status_code == 429: metrics.inc("provider_throttled_total", provider=provider)
+        if response.status_code >= 400: metrics.inc("provider_errors_total", provider=provider, reason=f"http_{response.status_code}")
+        return response
+    metrics.inc("provider_requests_total", provider=provider)
+    try:
+        yield record
+    except Exception as e:
+        metrics.inc("provider_errors_total", provider=provider, reason=type(e).__name__)
+        raise
+    finally:
+        metrics.observe("provider_request_seconds", time.perf_counter() - t0, provider=provider)
+
+# === HTTP exporter ===
+class _ExporterHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics": body, ctype = metrics.to_prometheus(), "text/plain; version=0.0.4"
+        elif self.path.rstrip("/") == "/metrics.json": body, ctype = metrics.to_json(), "application/json"
+        else: return self.send_error(404)
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def start_http_exporter(port: int, host: str = "0.0.0.0"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; idempotent per process."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = ThreadingHTTPServer((host, port), _ExporterHandler)
+            _exporter.daemon_threads = True
+            threading.Thread(target=_exporter.serve_forever, name="metrics-exporter", daemon=True).start()
+    return _exporter
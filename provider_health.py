@@ -0,0 +1,49 @@
+# provider_health.py
+
+import threading
+
+# === Rolling provider health ===
+class ProviderHealth:
+    """Exponentially weighted latency and success rate per provider.
+
+    `expected_cost` is the smoothed request latency divided by the smoothed success rate, i.e. roughly the
+    time it takes to get a usable answer; lower is better. Unseen providers keep their preference order.
+    """
+
+    def __init__(self, alpha: float = 0.2, prior_latency: float = 0.5, min_success: float = 0.05):
+        self.alpha, self.prior_latency, self.min_success = alpha, prior_latency, min_success
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, latency: float | None, outcome: str):
+        """Fold in one lookup. `outcome` is "ok", "error" or "empty": a provider that answered but has no data
+        for the symbol is neither a success nor a failure. `latency` is None when no request was made."""
+        with self._lock:
+            s = self._stats.setdefault(provider, {"latency": None, "success": None, "samples": 0})
+            a = self.alpha
+            if latency is not None:
+                s["latency"] = latency if s["latency"] is None else (1 - a) * s["latency"] + a * latency
+            if outcome != "empty":
+                hit = 1.0 if outcome == "ok" else 0.0
+                s["success"] = hit if s["success"] is None else (1 - a) * s["success"] + a * hit
+            s["samples"] += 1
+
+    def expected_cost(self, provider: str) -> float:
+        s = self._stats.get(provider)
+        if s is None: return self.prior_latency
+        latency = self.prior_latency if s["latency"] is None else s["latency"]
+        return latency / max(1.0 if s["success"] is None else s["success"], self.min_success)
+
+    def order(self, providers: list[str]) -> list[str]:
+        """Sort by expected cost; ties (e.g. no data yet) keep the given preference order."""
+        with self._lock:
+            return sorted(providers, key=lambda p: (round(self.expected_cost(p), 3), providers.index(p)))
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [{"provider": p, "latency_ms": None if s["latency"] is None else round(s["latency"] * 1000, 1),
+                     "success": None if s["success"] is None else round(s["success"], 3),
+                     "samples": s["samples"], "expected_cost_ms": round(self.expected_cost(p) * 1000, 1)}
+                    for p, s in sorted(self._stats.items())]
+
+provider_health = ProviderHealth()
@@ -0,0 +1,47 @@
+# rate_limiter.py
+
+import threading
+import time
+
+# === Token bucket ===
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity` stored."""
+
+    def __init__(self, rate: float, capacity: int | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then consume them."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    # usable as an HttpClient gate: every attempt (retries included) takes a token
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        return False
@@ -5,51 +5,75 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 import time
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from config import OHLCV_MAX_WORKERS, PROVIDER_LIMITS, BINANCE_API_BASE, COINGECKO_API_BASE, COINPAPRIKA_API_BASE, COINBASE_API_BASE
+from config import OHLCV_HEDGED, HEDGE_LATENCY_BUDGET, HEDGE_MAX_WORKERS, OHLCV_FRESH_TTL
+from config import INTRADAY_INTERVAL, INTRADAY_CANDLES, INTRADAY_FRESH_TTL, INTRADAY_MAX_STATES
+from rate_limiter import TokenBucket
+from candle_store import candle_store
+from symbol_maps import SymbolSnapshot
+from metrics import metrics
+from http_client import http, request_tally, tallied, add_tally
+from provider_health import provider_health
+from shared_cache import shared_cache
+from rolling_stats import RollingVCI
 
 # === API endpoints ===
-BINANCE_SYMBOLS_URL = "https://api.binance.com/api/v3/exchangeInfo"
-BINANCE_OHLCV_URL = "https://api.binance.com/api/v3/klines"
-COINGECKO_LIST_URL = "https://api.coingecko.com/api/v3/coins/list"
-COINGECKO_OHLC_URL = "https://api.coingecko.com/api/v3/coins/{id}/ohlc"
-COINGECKO_VOL_URL = "https://api.coingecko.com/api/v3/coins/{id}/market_chart"
-COINPAPRIKA_LIST_URL = "https://api.coinpaprika.com/v1/coins"
-COINPAPRIKA_MARKET_URL = "https://api.coinpaprika.com/v1/tickers/{id}/historical"
-COINBASE_API_URL = "https://api.exchange.coinbase.com"
+BINANCE_SYMBOLS_URL = f"{BINANCE_API_BASE}/api/v3/exchangeInfo"
+BINANCE_OHLCV_URL = f"{BINANCE_API_BASE}/api/v3/klines"
+COINGECKO_LIST_URL = f"{COINGECKO_API_BASE}/api/v3/coins/list"
+COINGECKO_OHLC_URL = COINGECKO_API_BASE + "/api/v3/coins/{id}/ohlc"
+COINGECKO_VOL_URL = COINGECKO_API_BASE + "/api/v3/coins/{id}/market_chart"
+COINPAPRIKA_LIST_URL = f"{COINPAPRIKA_API_BASE}/v1/coins"
+COINPAPRIKA_MARKET_URL = COINPAPRIKA_API_BASE + "/v1/tickers/{id}/historical"
+COINBASE_API_URL = COINBASE_API_BASE
+
+# === Per-provider request gates ===
+class ProviderGate:
+    """Caps in-flight requests and requests-per-second for one data provider."""
+
+    def __init__(self, max_concurrency: int, rate_per_sec: float):
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_sec, max_concurrency)
+
+    def __enter__(self):
+        self._slots.acquire()
+        self._bucket.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+        return False
+
+provider_gates = {name: ProviderGate(**limits) for name, limits in PROVIDER_LIMITS.items()}
+
+def provider_get(provider: str, url: str, params=None, revalidate: bool = False):
+    """GET through the shared HTTP client and the provider's gate (each retry attempt is gated and tracked)."""
+    return http.get(url, params=params, provider=provider, gate=provider_gates[provider], revalidate=revalidate)
 
 # === Mapping symbols to ids (Functions) ===
 def get_binance_symbols():
-    r = requests.get(BINANCE_SYMBOLS_URL)
+    r = provider_get("binance", BINANCE_SYMBOLS_URL, revalidate=True)
     r.raise_for_status()
     return {s["symbol"] for s in r.json()["symbols"]}
 
 def get_coingecko_ids():
-    r = requests.get(COINGECKO_LIST_URL)
+    r = provider_get("coingecko", COINGECKO_LIST_URL, revalidate=True)
     r.raise_for_status()
     return {item["symbol"].lower(): item["id"] for item in r.json()}
 
 def get_coinpaprika_ids():
-    r = requests.get(COINPAPRIKA_LIST_URL)
+    r = provider_get("coinpaprika", COINPAPRIKA_LIST_URL, revalidate=True)
     r.raise_for_status()
     return {item["symbol"].upper(): item["id"] for item in r.json() if not item.get("is_active") == False}
 
-# --- Robust Initial Loading of Symbol Maps ---
-try:
-    binance_symbols = get_binance_symbols()
-except Exception as e:
-    print(f"Warning: Could not fetch Binance symbols. Reason: {e}")
-    binance_symbols = set()
-
-try:
-    coingecko_map = get_coingecko_ids()
-except Exception as e:
-    print(f"Warning: Could not fetch CoinGecko IDs. Reason: {e}")
-    coingecko_map = {}
-
-try:
-    coinpaprika_map = get_coinpaprika_ids()
-except Exception as e:
-    print(f"Warning: Could not fetch CoinPaprika IDs. Reason: {e}")
-    coinpaprika_map = {}
+# --- Lazy Loading of Symbol Maps (snapshot on disk, refreshed in the background) ---
+binance_symbols = SymbolSnapshot("binance_symbols", get_binance_symbols)
+coingecko_map = SymbolSnapshot("coingecko_ids", get_coingecko_ids)
+coinpaprika_map = SymbolSnapshot("coinpaprika_ids", get_coinpaprika_ids)
 
 # === Check availability ===
 def exists_on_binance(symbol: str) -> bool:
@@ -62,115 +86,473 @@ def exists_on_coinpaprika(symbol: str) -> bool:
     return symbol.upper() in coinpaprika_map
 
 # === Fetch OHLCV from Data Sources ===
-def get_ohlcv_from_binance(symbol_usdt: str, interval="1d", limit=30):
-    params = {"symbol": symbol_usdt, "interval": interval, "limit": limit}
-    r = requests.get(BINANCE_OHLCV_URL, params=params)
-    r.raise_for_status()
-    df = pd.DataFrame(r.json(), columns=["open_time","open","high","low","close","volume","close_time","quote_asset_volume","num_trades","taker_buy_base_volume","taker_buy_quote_volume","ignore"])
-    return {"closes": df["close"].astype(float).tolist(), "volumes": df["volume"].astype(float).tolist()}
+DAY = 86400
+INTERVAL_SECONDS = {"1d": DAY, "4h": 14400, "1h": 3600, "15m": 900, "5m": 300}
+COINBASE_MAX_CANDLES = 300  # per request
+COINGECKO_OHLC_DAYS = (1, 7, 14, 30, 90, 180, 365)
+
+def _days_since(last_ts: int | None, days: int) -> int:
+    """Days of candles to request: the full window on a cold store, otherwise only the gap (last candle re-fetched)."""
+    if last_ts is None: return days
+    return int(min(days, max(1, (time.time() - last_ts) // DAY + 1)))
+
+def _daily(times_s, values) -> pd.Series:
+    """Collapse a time series to one value per UTC day (last observation wins)."""
+    s = pd.Series(np.asarray(values, dtype=float), index=(np.asarray(times_s, dtype=np.int64) // DAY) * DAY)
+    return s.groupby(level=0).last()
+
+def _read_through(symbol: str, provider: str, limit: int, fetch, interval: str = "1d", fresh_ttl: float = OHLCV_FRESH_TTL, since: int | None = None):
+    """Fetch only candles newer than the last stored one, persist them, then read `limit` candles (after `since`) back from the store.
+
+    Series fetched within `fresh_ttl` seconds (e.g. by the warm-up scheduler) are served from the store without a network call.
+    """
+    fetched_at = candle_store.fetched_at(symbol, provider, interval)
+    if fetched_at is not None and time.time() - fetched_at < fresh_ttl:
+        metrics.inc("cache_hits_total", provider=provider, layer="fresh_candles")
+    else:
+        last_ts = candle_store.last_timestamp(symbol, provider, interval)
+        # a stored-but-stale series still costs a request (an incremental one), so it is a miss, not a hit
+        metrics.inc("cache_misses_total", provider=provider, layer="candle_store", kind="cold" if last_ts is None else "stale")
+        times, closes, volumes = fetch(last_ts)
+        candle_store.upsert(symbol, provider, times, closes, volumes, interval)
+        candle_store.mark_fetched(symbol, provider, interval)
+    hist = candle_store.read(symbol, provider, limit, interval, since)
+    if not len(hist["closes"]): return None
+    return {"times": hist["times"], "closes": hist["closes"], "volumes": hist["volumes"]}
+
+def _fetch_failed(provider: str, e: Exception):
+    """Record a swallowed fetcher failure; HTTP/transport errors were already counted by track_request."""
+    if not isinstance(e, requests.RequestException):
+        metrics.inc("provider_errors_total", provider=provider, reason=type(e).__name__)
+    return None
+
+def get_ohlcv_from_binance(symbol_usdt: str, interval="1d", limit=30, fresh_ttl=OHLCV_FRESH_TTL, since=None):
+    def fetch(last_ts):
+        params = {"symbol": symbol_usdt, "interval": interval, "limit": limit}
+        # Binance returns the `limit` candles right after startTime; past a gap that long, ask for the newest ones instead
+        if last_ts is not None and (time.time() - last_ts) // INTERVAL_SECONDS[interval] < limit: params["startTime"] = last_ts * 1000
+        r = provider_get("binance", BINANCE_OHLCV_URL, params=params)
+        r.raise_for_status()
+        df = pd.DataFrame(r.json(), columns=["open_time","open","high","low","close","volume","close_time","quote_asset_volume","num_trades","taker_buy_base_volume","taker_buy_quote_volume","ignore"])
+        return (df["open_time"].astype(np.int64) // 1000).tolist(), df["close"].astype(float).tolist(), df["volume"].astype(float).tolist()
+    return _read_through(symbol_usdt, "binance", limit, fetch, interval, fresh_ttl, since)
+
+# The OHLC and market_chart calls of one CoinGecko lookup run side by side; the provider gate still caps them.
+# The side call's requests are credited back to the calling thread so the lookup's health record counts them.
+_side_requests = ThreadPoolExecutor(max_workers=PROVIDER_LIMITS["coingecko"]["max_concurrency"] * 2, thread_name_prefix="coingecko-vol")
 
 def get_ohlcv_from_coingecko(symbol: str, days=30):
     coin_id = coingecko_map.get(symbol.lower())
     if not coin_id: return None
-    try:
-        r1 = requests.get(COINGECKO_OHLC_URL.format(id=coin_id), params={"vs_currency": "usd", "days": days})
-        r2 = requests.get(COINGECKO_VOL_URL.format(id=coin_id), params={"vs_currency": "usd", "days": days, "interval": "daily"})
-        if r1.status_code != 200: return None
+    def fetch(last_ts):
+        n = _days_since(last_ts, days)
+        ohlc_days = next((d for d in COINGECKO_OHLC_DAYS if d >= n), COINGECKO_OHLC_DAYS[-1])
+        vol_future = _side_requests.submit(tallied, provider_get, "coingecko", COINGECKO_VOL_URL.format(id=coin_id), params={"vs_currency": "usd", "days": n, "interval": "daily"})
+        try:
+            r1 = provider_get("coingecko", COINGECKO_OHLC_URL.format(id=coin_id), params={"vs_currency": "usd", "days": ohlc_days})
+        finally:
+            r2, vol_error, vol_tally = vol_future.result()
+            add_tally(vol_tally)
+        if vol_error: raise vol_error
+        if r1.status_code != 200: return [], [], []
         closes_df = pd.DataFrame(r1.json(), columns=["time","open","high","low","close"])
-        if closes_df.empty: return None
-        closes = closes_df["close"].astype(float)
-        volumes = [0.0]*len(closes)
+        if closes_df.empty: return [], [], []
+        closes = _daily(closes_df["time"] // 1000, closes_df["close"])
+        volumes = pd.Series(0.0, index=closes.index)
         if r2.status_code == 200 and "total_volumes" in r2.json():
             vols_df = pd.DataFrame(r2.json()["total_volumes"], columns=["time","volume"])
             if not vols_df.empty:
-                vols = vols_df["volume"].astype(float)
-                m = min(len(closes), len(vols))
-                return {"closes": closes.tolist()[-m:], "volumes": vols.tolist()[-m:]}
-        return {"closes": closes.tolist(), "volumes": volumes}
-    except:
-        return None
+                vols = _daily(vols_df["time"] // 1000, vols_df["volume"])
+                closes, volumes = closes.align(vols, join="inner")
+        return closes.index.tolist(), closes.tolist(), volumes.tolist()
+    try:
+        return _read_through(symbol, "coingecko", days, fetch)
+    except Exception as e:
+        return _fetch_failed("coingecko", e)
+
+def get_daily_history_from_coingecko(symbol: str, days=365):
+    """Long daily history from market_chart alone (/ohlc switches to 4-day candles beyond 30 days); used by backfills.
+
+    Closes and volumes are bucketed per UTC day exactly like the volumes of get_ohlcv_from_coingecko, so the
+    series joins up with later incremental fetches."""
+    coin_id = coingecko_map.get(symbol.lower())
+    if not coin_id: return None
+    def fetch(last_ts):
+        params = {"vs_currency": "usd", "days": _days_since(last_ts, days), "interval": "daily"}
+        r = provider_get("coingecko", COINGECKO_VOL_URL.format(id=coin_id), params=params)
+        if r.status_code != 200: return [], [], []
+        data = r.json()
+        if not data.get("prices") or not data.get("total_volumes"): return [], [], []
+        prices, vols = (pd.DataFrame(data[k], columns=["time", "value"]) for k in ("prices", "total_volumes"))
+        closes, volumes = _daily(prices["time"] // 1000, prices["value"]).align(_daily(vols["time"] // 1000, vols["value"]), join="inner")
+        return closes.index.tolist(), closes.tolist(), volumes.tolist()
+    try:
+        return _read_through(symbol, "coingecko", days, fetch)
+    except Exception as e:
+        return _fetch_failed("coingecko", e)
 
 def get_ohlcv_from_coinpaprika(symbol: str, days=30):
     coin_id = coinpaprika_map.get(symbol.upper())
     if not coin_id: return None
-    try:
-        now = pd.Timestamp.now()
-        start = (now - pd.Timedelta(days=days)).strftime("%Y-%m-%d")
+    def fetch(last_ts):
+        now = pd.Timestamp.now(tz="UTC")
+        n = _days_since(last_ts, days)
+        start = (now - pd.Timedelta(days=n)).strftime("%Y-%m-%d")
         end = now.strftime("%Y-%m-%d")
-        params = {"start": start, "end": end, "limit": days, "quote": "usd"}
-        r = requests.get(COINPAPRIKA_MARKET_URL.format(id=coin_id), params=params)
-        if r.status_code != 200: return None
+        params = {"start": start, "end": end, "limit": n + 1, "quote": "usd", "interval": "1d"}
+        r = provider_get("coinpaprika", COINPAPRIKA_MARKET_URL.format(id=coin_id), params=params)
+        if r.status_code != 200: return [], [], []
         df = pd.DataFrame(r.json())
-        return {"closes": df["close"].astype(float).tolist()[-days:], "volumes": df["volume"].astype(float).tolist()[-days:]}
-    except:
-        return None
+        if df.empty: return [], [], []
+        times = (pd.to_datetime(df["timestamp"], utc=True) - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+        closes = df["close"] if "close" in df else df["price"]
+        volumes = df["volume"] if "volume" in df else df["volume_24h"]
+        daily_closes, daily_volumes = _daily(times, closes), _daily(times, volumes)
+        return daily_closes.index.tolist(), daily_closes.tolist(), daily_volumes.tolist()
+    try:
+        return _read_through(symbol, "coinpaprika", days, fetch)
+    except Exception as e:
+        return _fetch_failed("coinpaprika", e)
 
-def get_ohlcv_from_coinbase(symbol: str, days=30):
+def get_ohlcv_from_coinbase(symbol: str, days=30, interval="1d", fresh_ttl=OHLCV_FRESH_TTL, since=None):
     product_id = f"{symbol.upper()}-USD"
-    params = {"granularity": 86400}
-    try:
+    step = INTERVAL_SECONDS[interval]
+    limit = days * DAY // step
+    def fetch(last_ts):
         url = f"{COINBASE_API_URL}/products/{product_id}/candles"
-        r = requests.get(url, params=params)
-        r.raise_for_status()
-        data = r.json()
-        if not data: return None
-        data.sort(key=lambda x: x[0], reverse=True)
-        recent_data = data[:days]
-        recent_data.reverse()
-        df = pd.DataFrame(recent_data, columns=["time", "low", "high", "open", "close", "volume"])
-        return {"closes": df["close"].astype(float).tolist(), "volumes": df["volume"].astype(float).tolist()}
-    except:
-        return None
+        now = int(time.time())
+        start = now - limit * step if last_ts is None else last_ts
+        frames = []
+        while start < now:  # Coinbase answers at most 300 candles per request
+            end = min(start + COINBASE_MAX_CANDLES * step, now)
+            params = {"granularity": step, "start": pd.Timestamp(start, unit="s", tz="UTC").isoformat(), "end": pd.Timestamp(end, unit="s", tz="UTC").isoformat()}
+            r = provider_get("coinbase", url, params=params)
+            if r.status_code == 404: return [], [], []  # not listed on Coinbase; remembered until the series goes stale
+            r.raise_for_status()
+            if r.json(): frames.append(pd.DataFrame(r.json(), columns=["time", "low", "high", "open", "close", "volume"]))
+            start = end
+        if not frames: return [], [], []
+        df = pd.concat(frames).drop_duplicates("time", keep="last")
+        return df["time"].astype(np.int64).tolist(), df["close"].astype(float).tolist(), df["volume"].astype(float).tolist()
+    try:
+        return _read_through(symbol, "coinbase", limit, fetch, interval, fresh_ttl, since)
+    except Exception as e:
+        return _fetch_failed("coinbase", e)
 
 # === Unified fetcher for Rhythmic Analysis ===
 @st.cache_data(ttl=3600)
 def get_ohlcv(symbol: str):
+    metrics.inc("ohlcv_fetches_total")
+    return shared_cache.get_or_compute(f"ohlcv:1d:{symbol.upper()}", lambda: lookup_ohlcv(symbol), ttl=OHLCV_FRESH_TTL)
+
+def lookup_ohlcv(symbol: str):
+    """Uncached provider lookup behind `get_ohlcv` (also used by the warm-up scheduler outside Streamlit)."""
+    return get_ohlcv_hedged(symbol) if OHLCV_HEDGED else get_ohlcv_sequential(symbol)
+
+def get_ohlcv_sequential(symbol: str):
     if exists_on_binance(symbol):
         return get_ohlcv_from_binance(symbol.upper() + "USDT")
+    metrics.inc("ohlcv_fallback_total", provider="binance", reason="not_listed")
     g = get_ohlcv_from_coingecko(symbol)
     if g and sum(g["volumes"]) > 0:
         return g
+    metrics.inc("ohlcv_fallback_total", provider="coingecko", reason="zero_volume" if g else "no_data")
     if exists_on_coinpaprika(symbol):
         return get_ohlcv_from_coinpaprika(symbol)
+    metrics.inc("ohlcv_fallback_total", provider="coinpaprika", reason="not_listed")
     return g or None
 
+# === Hedged lookup ===
+# Preference order when no provider has health data yet (same order as the sequential chain).
+# Each entry: (listed?, fetcher, symbol as stored in the candle store).
+OHLCV_PROVIDERS = {
+    "binance": (exists_on_binance, lambda s: get_ohlcv_from_binance(s.upper() + "USDT"), lambda s: s.upper() + "USDT"),
+    "coingecko": (exists_on_coingecko, get_ohlcv_from_coingecko, str),
+    "coinpaprika": (exists_on_coinpaprika, get_ohlcv_from_coinpaprika, str),
+}
+# One bounded pool per provider: a fetch parked on CoinGecko's gate never delays a Binance one.
+_hedge_pools = {p: ThreadPoolExecutor(max_workers=min(HEDGE_MAX_WORKERS, PROVIDER_LIMITS[p]["max_concurrency"]), thread_name_prefix=f"ohlcv-hedge-{p}")
+                for p in OHLCV_PROVIDERS}
+
+def _is_fresh(provider: str, symbol: str) -> bool:
+    fetched_at = candle_store.fetched_at(OHLCV_PROVIDERS[provider][2](symbol), provider)
+    return fetched_at is not None and time.time() - fetched_at < OHLCV_FRESH_TTL
+
+def _usable(ohlcv) -> bool:
+    """A winning answer has candles and real volume (CoinGecko can return zero volumes)."""
+    return bool(ohlcv) and len(ohlcv["closes"]) > 0 and np.nansum(ohlcv["volumes"]) > 0
+
+def _timed_fetch(provider: str, symbol: str):
+    """Run one provider's fetcher, feeding its request latency and outcome into the rolling health score.
+
+    Only time on the wire counts (not provider-gate waits or store reads). HTTP failures are taken from the
+    client's tally since fetchers swallow them; an answer without usable data is a neutral "empty"."""
+    before = request_tally()
+    crashed = False
+    try:
+        result = OHLCV_PROVIDERS[provider][1](symbol)
+    except Exception as e:
+        result, crashed = _fetch_failed(provider, e), not isinstance(e, requests.RequestException)
+    n, seconds, failures = (after - b for after, b in zip(request_tally(), before))
+    outcome = "ok" if _usable(result) else "error" if crashed or failures else "empty"
+    provider_health.record(provider, seconds if n else None, outcome)
+    return result
+
+def get_ohlcv_hedged(symbol: str, budget: float = HEDGE_LATENCY_BUDGET):
+    """Ask providers with a fresh stored series first, then the healthiest listed ones. Every `budget` seconds
+    without a usable answer (or as soon as the pending ones fail) the next provider is queried in parallel.
+    The first usable answer wins; losers already running finish in the background and still land in the candle
+    store, queued ones are cancelled.
+    Falls back to a zero-volume answer if that is all there is."""
+    candidates = provider_health.order([p for p, (listed, *_) in OHLCV_PROVIDERS.items() if listed(symbol)])
+    candidates.sort(key=lambda p: not _is_fresh(p, symbol))  # series already warm in the store answer without a network call
+    if not candidates:
+        metrics.inc("ohlcv_fallback_total", provider="all", reason="not_listed")
+        return None
+    pending, fallback, queue = {}, None, list(candidates)
+    def launch():
+        provider = queue.pop(0)
+        if pending: metrics.inc("ohlcv_hedges_total", provider=provider)
+        pending[_hedge_pools[provider].submit(_timed_fetch, provider, symbol)] = provider
+    launch()
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=budget if queue else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for fut in done:
+                provider, result = pending.pop(fut), fut.result()
+                if _usable(result):
+                    metrics.inc("ohlcv_hedge_wins_total", provider=provider)
+                    return result
+                metrics.inc("ohlcv_fallback_total", provider=provider, reason="zero_volume" if result else "no_data")
+                fallback = fallback or result
+            if not pending and queue: launch()
+        return fallback
+    finally:
+        for fut in pending: fut.cancel()  # losers still queued are dropped; running ones finish into the store
+
 # === Rhythm-based filter logic ===
+VCI_WINDOW = 30
+VCI_PASS = 1.6
+VCI_FULL_SCORE = 2.5
+MOM_MIN, MOM_MAX = 0.5, 12.0
+VCI_WEIGHT, MOM_WEIGHT = 0.6, 0.4
+
 def simple_rhythm_filter(ohlcv: dict, percent_change_7d: float) -> dict:
     closes = np.array(ohlcv["closes"], dtype=float)
     volumes = np.array(ohlcv["volumes"], dtype=float)
-    if len(closes) < 30:
+    if len(closes) < VCI_WINDOW:
         return {"pass": False, "score": 0.0, "reason": "too_few_candles"}
     has_volume = np.nansum(volumes) > 0
-    if has_volume:
-        v_ref = np.median(volumes[-30:]) + 1e-9
-        vci = volumes[-1] / v_ref
-        vci_score = np.clip((vci - 1.0) / (2.5 - 1.0), 0, 1)
+    vci = volumes[-1] / (np.median(volumes[-VCI_WINDOW:]) + 1e-9) if has_volume else None
+    return rhythm_result(vci, percent_change_7d)
+
+def rhythm_result(vci: float | None, percent_change_7d: float) -> dict:
+    """Score a coin from its VCI (None when it has no volume data) and 7-day change."""
+    if vci is not None:
+        vci_score = np.clip((vci - 1.0) / (VCI_FULL_SCORE - 1.0), 0, 1)
         vci_for_out = round(vci, 2)
-        vci_pass = vci >= 1.6
+        vci_pass = vci >= VCI_PASS
     else:
         vci_score = 0.0; vci_for_out = None; vci_pass = True
-    mom_score = np.clip((percent_change_7d - 0.5) / (12.0 - 0.5), 0, 1)
-    score = 0.6 * vci_score + 0.4 * mom_score
-    passed = vci_pass and (0.5 <= percent_change_7d <= 12.0)
+    mom_score = np.clip((percent_change_7d - MOM_MIN) / (MOM_MAX - MOM_MIN), 0, 1)
+    score = VCI_WEIGHT * vci_score + MOM_WEIGHT * mom_score
+    passed = vci_pass and (MOM_MIN <= percent_change_7d <= MOM_MAX)
     return {"pass": passed, "score": round(score, 3), "vci": vci_for_out, "mom": round(percent_change_7d, 2)}
 
+# === Vectorized batch scoring ===
+def stack_volumes(ohlcvs: list[dict], window: int = VCI_WINDOW):
+    """Stack per-coin OHLCV dicts into an (n, window) matrix of trailing volumes, left-padded with NaN.
+
+    Returns (volumes, candle_counts, has_volume); has_volume is computed over each coin's full series.
+    """
+    n = len(ohlcvs)
+    volumes = np.full((n, window), np.nan)
+    counts = np.zeros(n, dtype=np.int64)
+    has_volume = np.zeros(n, dtype=bool)
+    for i, ohlcv in enumerate(ohlcvs):
+        v = np.asarray(ohlcv["volumes"], dtype=float)
+        counts[i] = len(ohlcv["closes"])
+        has_volume[i] = np.nansum(v) > 0
+        tail = v[-window:]
+        if len(tail): volumes[i, window - len(tail):] = tail
+    return volumes, counts, has_volume
+
+def score_batch(volumes: np.ndarray, counts: np.ndarray, percent_change_7d: np.ndarray, has_volume: np.ndarray | None = None, window: int = VCI_WINDOW) -> dict:
+    """Score every coin at once; `volumes` is (n, >=window) with the latest candle in the last column.
+
+    Coins with fewer than `window` candles are masked out via `valid`. Matches simple_rhythm_filter row by row.
+    """
+    pct = np.asarray(percent_change_7d, dtype=float)
+    valid = np.asarray(counts) >= window
+    if has_volume is None: has_volume = np.nansum(volumes, axis=1) > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        v_ref = np.median(volumes[:, -window:], axis=1) + 1e-9
+        vci = volumes[:, -1] / v_ref
+        vci_score = np.where(has_volume, np.clip((vci - 1.0) / (VCI_FULL_SCORE - 1.0), 0, 1), 0.0)
+        vci_pass = ~has_volume | (vci >= VCI_PASS)
+    mom_score = np.clip((pct - MOM_MIN) / (MOM_MAX - MOM_MIN), 0, 1)
+    score = VCI_WEIGHT * vci_score + MOM_WEIGHT * mom_score
+    passed = valid & vci_pass & (pct >= MOM_MIN) & (pct <= MOM_MAX)
+    return {"valid": valid, "has_volume": has_volume, "vci": vci, "vci_score": vci_score, "mom_score": mom_score, "score": score, "pass": passed}
+
+def batch_results(symbols: list, percent_change_7d: list, scored: dict) -> list[dict]:
+    """Convert score_batch output into the per-symbol dicts produced by simple_rhythm_filter."""
+    out = []
+    for i, symbol in enumerate(symbols):
+        if not scored["valid"][i]:
+            out.append({"symbol": symbol, "pass": False, "score": 0.0, "reason": "too_few_candles"})
+            continue
+        vci = round(scored["vci"][i], 2) if scored["has_volume"][i] else None
+        out.append({"symbol": symbol, "pass": scored["pass"][i], "score": round(scored["score"][i], 3), "vci": vci, "mom": round(percent_change_7d[i], 2)})
+    return out
+
 # === Batch analyzer function ===
-def analyze_with_rhythmic(coins: list[dict], progress_bar=None, status_text=None) -> list[dict]:
-    results = []
+def ohlcv_lane(symbol: str) -> str:
+    """The provider a lookup of `symbol` queues on first (its first listed one), or "other"."""
+    try: return next((p for p, (listed, *_) in OHLCV_PROVIDERS.items() if listed(symbol)), "other")
+    except Exception: return "other"
+
+def fetch_coin_ohlcv(coin: dict):
+    """Return (ohlcv, error_reason) for one coin; exactly one of them is None."""
+    metrics.inc("ohlcv_lookups_total")
+    try:
+        ohlcv = get_ohlcv(coin.get("symbol"))
+        return (ohlcv, None) if ohlcv else (None, "no_data")
+    except Exception as e:
+        return None, str(e)
+
+def analyze_coin(coin: dict) -> dict:
+    symbol = coin.get("symbol")
+    ohlcv, reason = fetch_coin_ohlcv(coin)
+    if reason: return {"symbol": symbol, "pass": False, "score": 0.0, "reason": reason}
+    try:
+        return {"symbol": symbol, **simple_rhythm_filter(ohlcv, coin.get("percent_change_7d", 0))}
+    except Exception as e:
+        return {"symbol": symbol, "pass": False, "score": 0.0, "reason": str(e)}
+
+def score_coins(coins: list[dict], fetched: list[tuple]) -> list[dict]:
+    """Score fetched (ohlcv, error_reason) pairs for `coins` in one vectorized pass, keeping input order."""
+    results = [None] * len(coins)
+    idx = []
+    for i, (coin, (ohlcv, reason)) in enumerate(zip(coins, fetched)):
+        pct = coin.get("percent_change_7d", 0)
+        if reason:
+            results[i] = {"symbol": coin.get("symbol"), "pass": False, "score": 0.0, "reason": reason}
+        elif isinstance(pct, (int, float)) and not isinstance(pct, bool):
+            idx.append(i)
+        else:
+            results[i] = analyze_coin(coin)
+    if idx:
+        volumes, counts, has_volume = stack_volumes([fetched[i][0] for i in idx])
+        pcts = [coins[i].get("percent_change_7d", 0) for i in idx]
+        scored = score_batch(volumes, counts, pcts, has_volume)
+        for i, res in zip(idx, batch_results([coins[i].get("symbol") for i in idx], pcts, scored)):
+            results[i] = res
+    return results
+
+def analyze_with_rhythmic(coins: list[dict], progress_bar=None, status_text=None, max_workers: int = OHLCV_MAX_WORKERS) -> list[dict]:
+    """Analyze `coins`, fetching OHLCV for up to `max_workers` symbols at once and scoring them in one batch; results keep input order."""
     total_coins = len(coins)
-    for i, coin in enumerate(coins):
-        symbol = coin.get("symbol")
-        if status_text: status_text.text(f"در حال تحلیل {symbol}... ({i + 1}/{total_coins})")
-        if progress_bar: progress_bar.progress((i + 1) / total_coins)
-        try:
-            ohlcv = get_ohlcv(symbol)
-            if not ohlcv:
-                results.append({"symbol": symbol, "pass": False, "score": 0.0, "reason": "no_data"})
-                continue
-            analysis = simple_rhythm_filter(ohlcv, coin.get("percent_change_7d", 0))
-            results.append({"symbol": symbol, **analysis})
-        except Exception as e:
-            results.append({"symbol": symbol, "pass": False, "score": 0.0, "reason": str(e)})
+    fetched = [None] * total_coins
+    with metrics.span("rhythmic_fetch"):
+        _fetch_all(coins, fetched, progress_bar, status_text, max_workers)
+    with metrics.span("rhythmic_score"):
+        results = score_coins(coins, fetched)
+    if status_text: status_text.text("✅ تحلیل کامل شد!")
+    if progress_bar: progress_bar.progress(1.0)
+    return results
+
+def _fetch_all(coins: list[dict], fetched: list, progress_bar, status_text, max_workers: int):
+    total_coins = len(coins)
+    if max_workers <= 1:
+        for i, coin in enumerate(coins):
+            if status_text: status_text.text(f"در حال تحلیل {coin.get('symbol')}... ({i + 1}/{total_coins})")
+            if progress_bar: progress_bar.progress((i + 1) / total_coins)
+            fetched[i] = fetch_coin_ohlcv(coin)
+    else:
+        # One pool per provider, sized by its concurrency budget: coins waiting on a slow provider's gate
+        # (CoinGecko at 0.5 rps) never hold the threads that Binance-listed coins need.
+        lanes = {}
+        for i, coin in enumerate(coins): lanes.setdefault(ohlcv_lane(coin.get("symbol")), []).append(i)
+        with ExitStack() as stack:
+            futures = {}
+            for lane, idx in lanes.items():
+                size = min(max_workers, PROVIDER_LIMITS[lane]["max_concurrency"]) if lane in PROVIDER_LIMITS else max_workers
+                pool = stack.enter_context(ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"ohlcv-{lane}"))
+                futures.update({pool.submit(fetch_coin_ohlcv, coins[i]): i for i in idx})
+            for done, fut in enumerate(as_completed(futures), start=1):
+                i = futures[fut]
+                fetched[i] = fut.result()
+                if status_text: status_text.text(f"در حال تحلیل {coins[i].get('symbol')}... ({done}/{total_coins})")
+                if progress_bar: progress_bar.progress(done / total_coins)
+
+# === Intraday rhythm mode ===
+# Hourly/15-minute candles from Binance (`interval`) or Coinbase (`granularity`). Each coin keeps a RollingVCI
+# between runs, so a rescore only reads and folds in the candles that closed since the previous one.
+BINANCE_MAX_CANDLES = 1000  # per request
+_intraday_states: OrderedDict[tuple, RollingVCI] = OrderedDict()  # LRU, capped at INTRADAY_MAX_STATES
+_intraday_lock = threading.Lock()
+
+def reset_intraday_state():
+    with _intraday_lock: _intraday_states.clear()
+
+def intraday_provider(symbol: str) -> str:
+    return "binance" if exists_on_binance(symbol) else "coinbase"
+
+def intraday_store_key(symbol: str, provider: str) -> str:
+    return symbol.upper() + "USDT" if provider == "binance" else symbol
+
+def get_intraday_ohlcv(symbol: str, provider: str, interval: str = INTRADAY_INTERVAL, limit: int = INTRADAY_CANDLES, since: int | None = None):
+    if provider == "binance":
+        return get_ohlcv_from_binance(intraday_store_key(symbol, provider), interval, min(limit, BINANCE_MAX_CANDLES), INTRADAY_FRESH_TTL, since)
+    days = -(-limit * INTERVAL_SECONDS[interval] // DAY)
+    return get_ohlcv_from_coinbase(symbol, days, interval, INTRADAY_FRESH_TTL, since)
+
+def intraday_state(symbol: str, provider: str, interval: str, window: int = INTRADAY_CANDLES) -> RollingVCI:
+    key = (symbol.upper(), provider, interval, window)
+    with _intraday_lock:
+        state = _intraday_states.get(key)
+        if state is None:
+            state = _intraday_states[key] = RollingVCI(window)
+            while len(_intraday_states) > INTRADAY_MAX_STATES: _intraday_states.popitem(last=False)
+        else: _intraday_states.move_to_end(key)
+        return state
+
+def analyze_coin_intraday(coin: dict, interval: str = INTRADAY_INTERVAL, window: int = INTRADAY_CANDLES) -> dict:
+    symbol = coin.get("symbol")
+    try:
+        provider = intraday_provider(symbol)
+        state = intraday_state(symbol, provider, interval, window)
+        with state.lock:
+            ohlcv = get_intraday_ohlcv(symbol, provider, interval, window, since=state.last_ts)
+            if ohlcv:
+                # closed as of the fetch that stored them: a candle still forming then (possibly re-served from the
+                # store within INTRADAY_FRESH_TTL) waits until a later fetch overwrites it with its final volume
+                fetched_at = candle_store.fetched_at(intraday_store_key(symbol, provider), provider, interval) or 0
+                closed = ohlcv["times"] + INTERVAL_SECONDS[interval] <= fetched_at
+                state.update(ohlcv["times"][closed], ohlcv["volumes"][closed])
+            if not len(state): return {"symbol": symbol, "pass": False, "score": 0.0, "reason": "no_data"}
+            if len(state) < VCI_WINDOW: return {"symbol": symbol, "pass": False, "score": 0.0, "reason": "too_few_candles"}
+            vci = state.value()
+        return {"symbol": symbol, **rhythm_result(vci, coin.get("percent_change_7d", 0))}
+    except Exception as e:
+        return {"symbol": symbol, "pass": False, "score": 0.0, "reason": str(e)}
+
+def analyze_with_intraday(coins: list[dict], progress_bar=None, status_text=None, interval: str = INTRADAY_INTERVAL,
+                          max_workers: int = OHLCV_MAX_WORKERS) -> list[dict]:
+    """Intraday counterpart of analyze_with_rhythmic; results keep input order."""
+    total_coins = len(coins)
+    results = [None] * total_coins
+    with metrics.span("intraday_analysis"), ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(analyze_coin_intraday, coin, interval): i for i, coin in enumerate(coins)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            i = futures[fut]
+            results[i] = fut.result()
+            if status_text: status_text.text(f"در حال تحلیل {coins[i].get('symbol')}... ({done}/{total_coins})")
+            if progress_bar: progress_bar.progress(done / total_coins)
     if status_text: status_text.text("✅ تحلیل کامل شد!")
     if progress_bar: progress_bar.progress(1.0)
     return results
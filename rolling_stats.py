@@ -0,0 +1,115 @@
+# rolling_stats.py
+
+import heapq
+import threading
+from collections import deque
+
+# === Sliding-window median ===
+class RollingMedian:
+    """Median of the last `window` values in O(log n) per update.
+
+    Two heaps split the window (`_low` is a max-heap via negation, `_high` a min-heap). Values leaving the
+    window are not searched for; they are counted in `_delayed` and dropped when they surface at a heap top,
+    and the heaps are rebuilt from the window whenever stale entries outnumber live ones.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque()
+        self._low, self._high = [], []
+        self._low_size = self._high_size = 0
+        self._delayed: dict[float, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def push(self, x: float):
+        x = float(x)
+        self._values.append(x)
+        if not self._low or x <= -self._low[0]:
+            heapq.heappush(self._low, -x); self._low_size += 1
+        else:
+            heapq.heappush(self._high, x); self._high_size += 1
+        if len(self._values) > self.window: self._remove(self._values.popleft())
+        self._balance()
+        if len(self._low) + len(self._high) > 2 * self.window + 64: self._rebuild()
+
+    def median(self) -> float | None:
+        if not self._values: return None
+        if self._low_size > self._high_size: return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2
+
+    def _remove(self, x: float):
+        self._delayed[x] = self._delayed.get(x, 0) + 1
+        if x <= -self._low[0]:
+            self._low_size -= 1
+            if x == -self._low[0]: self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if x == self._high[0]: self._prune(self._high, 1)
+
+    def _prune(self, heap: list, sign: int):
+        while heap and self._delayed.get(sign * heap[0], 0):
+            x = sign * heapq.heappop(heap)
+            self._delayed[x] -= 1
+            if not self._delayed[x]: del self._delayed[x]
+
+    def _rebuild(self):
+        """Drop buried stale entries so heap memory stays bounded by the window (amortized O(log n) per push)."""
+        ordered = sorted(self._values)
+        split = (len(ordered) + 1) // 2
+        self._low = [-x for x in ordered[:split]]; heapq.heapify(self._low)
+        self._high = ordered[split:]
+        self._low_size, self._high_size = split, len(ordered) - split
+        self._delayed = {}
+
+    def _balance(self):
+        # keep _low_size == _high_size or _high_size + 1
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1; self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1; self._low_size += 1
+            self._prune(self._high, 1)
+
+# === Incremental VCI ===
+class RollingVCI:
+    """Volume climax index (latest volume / rolling median volume) fed one closed candle at a time.
+
+    Only candles newer than `last_ts` are consumed, so re-feeding an overlapping history costs nothing.
+    """
+
+    def __init__(self, window: int):
+        self.median = RollingMedian(window)
+        self.last_ts: int | None = None
+        self.last_volume: float | None = None
+        self._volume_sum = 0.0
+        self._window_volumes = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.median)
+
+    def update(self, times, volumes) -> int:
+        """Consume candles with ts > last_ts (ascending input); returns how many were new."""
+        added = 0
+        for t, v in zip(times, volumes):
+            t = int(t)
+            if self.last_ts is not None and t <= self.last_ts: continue
+            v = float(v)
+            if len(self._window_volumes) == self._window_volumes.maxlen: self._volume_sum -= self._window_volumes[0]
+            self._window_volumes.append(v)
+            self._volume_sum += v
+            self.median.push(v)
+            self.last_ts, self.last_volume = t, v
+            added += 1
+        return added
+
+    def has_volume(self) -> bool:
+        return self._volume_sum > 0
+
+    def value(self) -> float | None:
+        if not len(self) or not self.has_volume(): return None
+        return self.last_volume / (self.median.median() + 1e-9)
@@ -0,0 +1,137 @@
+# screener_pipeline.py
+"""Headless screener: listing -> process -> preset filter -> OHLCV -> rhythm score, streamed to JSONL or Parquet.
+
+Usage:
+    python screener_pipeline.py --preset Balanced --output results.jsonl
+    python screener_pipeline.py --preset Aggressive --source live --format parquet --output results.parquet
+    python screener_pipeline.py --preset Balanced --interval 1h --passed-only
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import OHLCV_MAX_WORKERS
+from market_listing import listing_store, iter_listing_pages, PROCESSED_COLS, PRESETS, process_dataframe, volume_mc_ratio, filter_listing
+from rhythmic_analyzer import analyze_coin, analyze_coin_intraday
+import pandas as pd
+
+RESULT_FIELDS = ["symbol", "name", "percent_change_7d", "pass", "score", "vci", "mom", "reason"]
+
+# === Stages (each one a generator) ===
+def iter_listing_frames(source: str = "snapshot", max_coins: int | None = None):
+    """Yield raw listing frames: the whole last snapshot at once, or live API pages as they arrive."""
+    if source == "snapshot":
+        df = listing_store.load()
+        yield df if max_coins is None else df.head(max_coins)
+        return
+    for _, rows in iter_listing_pages(max_coins):
+        if rows: yield pd.DataFrame(rows).drop(columns=["id"])
+
+def iter_candidates(frames, filter_params: dict):
+    """Process and filter each frame, yielding candidate coin records."""
+    cols = [PROCESSED_COLS['symbol'], PROCESSED_COLS['name'], PROCESSED_COLS['percent_change_7d']]
+    for frame in frames:
+        df = process_dataframe(frame)
+        if df is None or df.empty: continue
+        df['volume_mc_ratio'] = volume_mc_ratio(df)
+        yield from filter_listing(df, filter_params)[cols].to_dict("records")
+
+def _score(coin: dict, interval: str = "1d") -> dict:
+    result = analyze_coin(coin) if interval == "1d" else analyze_coin_intraday(coin, interval)
+    return {"name": coin.get("name"), "percent_change_7d": coin.get("percent_change_7d"), **result}
+
+def iter_scored(candidates, max_workers: int = OHLCV_MAX_WORKERS, interval: str = "1d"):
+    """Fetch OHLCV and score candidates concurrently, yielding each result as it completes.
+
+    At most 2 * max_workers coins are in flight, so memory does not grow with the universe.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        for coin in candidates:
+            pending.add(pool.submit(_score, coin, interval))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done: yield fut.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done: yield fut.result()
+
+# === Sinks ===
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self._file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, result: dict):
+        self._file.write(json.dumps({k: _plain(result.get(k)) for k in RESULT_FIELDS}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout: self._file.close()
+
+class ParquetWriter:
+    """Buffers `batch_size` results per row group; each group is on disk as soon as it is full."""
+
+    def __init__(self, path: str, batch_size: int = 100):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([("symbol", pa.string()), ("name", pa.string()), ("percent_change_7d", pa.float64()), ("pass", pa.bool_()),
+                                  ("score", pa.float64()), ("vci", pa.float64()), ("mom", pa.float64()), ("reason", pa.string())])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._batch, self._batch_size = [], batch_size
+
+    def write(self, result: dict):
+        self._batch.append({k: _plain(result.get(k)) for k in RESULT_FIELDS})
+        if len(self._batch) >= self._batch_size: self._flush()
+
+    def _flush(self):
+        if self._batch:
+            self._writer.write_table(self._pa.Table.from_pylist(self._batch, schema=self._schema))
+            self._batch = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+# === Pipeline ===
+def run(filter_params: dict, writer, source: str = "snapshot", max_coins: int | None = None,
+        max_workers: int = OHLCV_MAX_WORKERS, passed_only: bool = False, interval: str = "1d") -> dict:
+    counts = {"scored": 0, "passed": 0}
+    for result in iter_scored(iter_candidates(iter_listing_frames(source, max_coins), filter_params), max_workers, interval):
+        counts["scored"] += 1
+        if result.get("pass"): counts["passed"] += 1
+        elif passed_only: continue
+        writer.write(result)
+    return counts
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the altcoin screener and rhythmic analysis without Streamlit.")
+    parser.add_argument("--preset", choices=list(PRESETS), default="Balanced")
+    for key in PRESETS["Balanced"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=float, help=f"override the preset's {key}")
+    parser.add_argument("--source", choices=["snapshot", "live"], default="snapshot", help="last listing snapshot, or stream pages from the API")
+    parser.add_argument("--max-coins", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=OHLCV_MAX_WORKERS)
+    parser.add_argument("--interval", choices=["1d", "1h", "15m"], default="1d", help="daily candles, or the intraday rhythm mode")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default=None, help="defaults to the output file extension")
+    parser.add_argument("--output", "-o", default="-", help="output path, '-' for stdout (jsonl only)")
+    parser.add_argument("--passed-only", action="store_true", help="only write coins that pass the rhythm filter")
+    args = parser.parse_args(argv)
+
+    filter_params = {k: (getattr(args, k) if getattr(args, k) is not None else v) for k, v in PRESETS[args.preset].items()}
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    if fmt == "parquet" and args.output == "-": parser.error("parquet output needs --output PATH")
+    writer = ParquetWriter(args.output) if fmt == "parquet" else JsonlWriter(args.output)
+    try:
+        counts = run(filter_params, writer, args.source, args.max_coins, args.workers, args.passed_only, args.interval)
+    finally:
+        writer.close()
+    print(f"scored={counts['scored']} passed={counts['passed']}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# shared_cache.py
+
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from config import DATA_DIR, SHARED_CACHE_URL, SHARED_CACHE_LOCK_TTL, SHARED_CACHE_POLL
+from metrics import metrics
+
+# === Backends ===
+class SQLiteBackend:
+    """Key/value entries with expiry plus advisory locks in one SQLite file, shared by processes on the same host."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> bytes | None:
+        row = self._conn().execute("SELECT value FROM entries WHERE key=? AND expires_at>?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, value, now + ttl))
+            conn.execute("DELETE FROM entries WHERE expires_at<=?", (now,))
+
+    def delete(self, key: str):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries WHERE key=?", (key,))
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM locks")
+
+    def acquire(self, key: str, token: str, ttl: float) -> bool:
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute("DELETE FROM locks WHERE key=? AND expires_at<=?", (key, now))
+            return conn.execute("INSERT OR IGNORE INTO locks VALUES (?, ?, ?)", (key, token, now + ttl)).rowcount == 1
+
+    def release(self, key: str, token: str):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM locks WHERE key=? AND token=?", (key, token))
+
+    def locked(self, key: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM locks WHERE key=? AND expires_at>?", (key, time.time())).fetchone() is not None
+
+class RedisBackend:
+    """Same operations on a Redis-compatible server (plain GET/SET/DEL/SCAN, so lightweight fakes work too)."""
+
+    def __init__(self, client, prefix: str = "screener:"):
+        self.client, self.prefix = client, prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SHARED_CACHE_URL points at Redis but the `redis` package is not installed (pip install redis)")
+        return cls(redis.Redis.from_url(url, socket_timeout=5), **kwargs)
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys: self.client.delete(*keys)
+
+    def acquire(self, key: str, token: str, ttl: float) -> bool:
+        return bool(self.client.set(self.prefix + "lock:" + key, token, nx=True, px=max(1, int(ttl * 1000))))
+
+    def release(self, key: str, token: str):
+        # check-then-delete; a lock that expired in between was already up for grabs
+        if self.client.get(self.prefix + "lock:" + key) == token.encode(): self.client.delete(self.prefix + "lock:" + key)
+
+    def locked(self, key: str) -> bool:
+        return self.client.get(self.prefix + "lock:" + key) is not None
+
+def backend_from_url(url: str = SHARED_CACHE_URL):
+    """'sqlite' | 'sqlite:///path' | 'redis://...' | 'none'."""
+    if not url or url == "none": return None
+    if url == "sqlite": return SQLiteBackend(os.path.join(DATA_DIR, "shared_cache.db"))
+    if url.startswith("sqlite:///"): return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")): return RedisBackend.from_url(url)
+    raise ValueError(f"unsupported SHARED_CACHE_URL: {url}")
+
+# === Entry encoding ===
+# Data-only, so a tampered backend entry can at worst yield wrong data, never run code (no pickle):
+# "F" a DataFrame as Parquet, "A" a dict of numeric arrays as .npz, "T" a tuple of encoded parts, "J" JSON.
+def encode(value) -> bytes:
+    """Raises TypeError for anything the formats above cannot carry."""
+    if isinstance(value, tuple):
+        parts = [encode(v) for v in value]
+        return b"T" + json.dumps([len(p) for p in parts]).encode() + b"\n" + b"".join(parts)
+    if isinstance(value, pd.DataFrame):
+        return b"F" + value.to_parquet()
+    if isinstance(value, dict) and value and all(isinstance(v, np.ndarray) for v in value.values()):
+        if any(v.dtype.hasobject for v in value.values()): raise TypeError("object arrays are not cacheable")
+        buf = io.BytesIO()
+        np.savez(buf, **value)
+        return b"A" + buf.getvalue()
+    return b"J" + json.dumps(value).encode()
+
+def decode(data: bytes):
+    tag, body = data[:1], data[1:]
+    if tag == b"T":
+        header, _, body = body.partition(b"\n")
+        parts, offset = [], 0
+        for n in json.loads(header):
+            parts.append(decode(body[offset:offset + n]))
+            offset += n
+        return tuple(parts)
+    if tag == b"F": return pd.read_parquet(io.BytesIO(body))
+    if tag == b"A":
+        with np.load(io.BytesIO(body), allow_pickle=False) as npz: return {k: npz[k] for k in npz.files}
+    if tag == b"J": return json.loads(body)
+    raise ValueError(f"unknown shared cache entry tag {tag!r}")
+
+# === Single-flight cache ===
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value, self.error = None, None
+
+class SharedCache:
+    """Read-through cache where N concurrent misses for one key cause exactly one `compute()`.
+
+    Threads of one process wait on the leader's in-process flight; other processes see the backend lock and
+    poll until the value lands (or the holder's lock is released/expires, in which case they take over).
+    If the backend itself is unreachable the value is computed directly, so the cache never blocks the app.
+    """
+
+    def __init__(self, backend=None, lock_ttl: float = SHARED_CACHE_LOCK_TTL, poll: float = SHARED_CACHE_POLL):
+        self.backend, self.lock_ttl, self.poll = backend, lock_ttl, poll
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: str, compute, ttl: float):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader: flight = self._flights[key] = _Flight()
+        if not leader:
+            metrics.inc("singleflight_waits_total", cache=key.split(":")[0], scope="process")
+            flight.done.wait()
+            if flight.error is not None: raise flight.error
+            return flight.value
+        try:
+            flight.value = self._shared(key, compute, ttl)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock: del self._flights[key]
+            flight.done.set()
+
+    def invalidate(self, key: str):
+        if self.backend is not None: self.backend.delete(key)
+
+    def clear(self):
+        if self.backend is not None: self.backend.clear()
+
+    def _shared(self, key: str, compute, ttl: float):
+        """Compute at most once: backend failures before compute fall back to a plain compute, failures after it
+        only cost the shared copy."""
+        if self.backend is None: return compute()
+        try:
+            found, value, token = self._claim(key)
+        except Exception as e:
+            metrics.inc("shared_cache_errors_total", stage="claim", reason=type(e).__name__)
+            return compute()
+        if found: return value
+        try:
+            value = compute()
+            self._store(key, value, ttl)
+            return value
+        finally:
+            try: self.backend.release(key, token)
+            except Exception as e: metrics.inc("shared_cache_errors_total", stage="release", reason=type(e).__name__)
+
+    def _lookup(self, key: str):
+        data = self.backend.get(key)
+        return (False, None) if data is None else (True, decode(data))
+
+    def _claim(self, key: str):
+        """-> (True, value, None) on a hit, or (False, None, token) once this process holds the key's lock."""
+        name = key.split(":")[0]
+        found, value = self._lookup(key)
+        if found:
+            metrics.inc("cache_hits_total", layer="shared_cache", cache=name)
+            return True, value, None
+        metrics.inc("cache_misses_total", layer="shared_cache", cache=name)
+        token = uuid.uuid4().hex
+        while True:
+            if self.backend.acquire(key, token, self.lock_ttl):
+                try: found, value = self._lookup(key)  # another process may have filled it between our miss and the lock
+                except Exception:
+                    self.backend.release(key, token)
+                    raise
+                if not found: return False, None, token
+                self.backend.release(key, token)
+                return True, value, None
+            metrics.inc("singleflight_waits_total", cache=name, scope="shared")
+            while self.backend.locked(key):
+                time.sleep(self.poll)
+            found, value = self._lookup(key)
+            if found: return True, value, None
+
+    def _store(self, key: str, value, ttl: float):
+        """Best effort: an unencodable, oversized or unreachable write leaves the caller's value intact."""
+        try: self.backend.set(key, encode(value), ttl)
+        except Exception as e:
+            metrics.inc("shared_cache_errors_total", stage="store", reason=type(e).__name__)
+            print(f"Warning: Could not store shared cache entry {key}. Reason: {e}")
+
+shared_cache = SharedCache(backend_from_url())
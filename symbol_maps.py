@@ -0,0 +1,103 @@
+# symbol_maps.py
+
+import gzip
+import json
+import os
+import threading
+import time
+from config import SYMBOL_SNAPSHOT_DIR, SYMBOL_MAP_TTL
+
+RETRY_AFTER_FAILURE = 60
+
+# === Lazy, snapshot-backed symbol map ===
+class SymbolSnapshot:
+    """A set or dict of provider symbols, loaded on first use from an on-disk snapshot.
+
+    A missing snapshot is fetched synchronously; an expired one is served as-is while
+    a background thread refreshes it. Supports `in`, `get` and `len` like the set/dict it wraps.
+    """
+
+    def __init__(self, name: str, loader, ttl: int = SYMBOL_MAP_TTL, directory: str = SYMBOL_SNAPSHOT_DIR):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.path = os.path.join(directory, f"{name}.json.gz")
+        self._data = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    # --- snapshot I/O ---
+    def _read_snapshot(self):
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None, 0.0
+        data = payload["data"]
+        return (frozenset(data) if payload["kind"] == "set" else data), payload["fetched_at"]
+
+    def _write_snapshot(self, data, fetched_at: float):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        is_set = isinstance(data, (set, frozenset))
+        payload = {"kind": "set" if is_set else "dict", "fetched_at": fetched_at, "data": sorted(data) if is_set else data}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    # --- loading ---
+    def _fetch(self):
+        data = self.loader()
+        data = frozenset(data) if isinstance(data, set) else data
+        fetched_at = time.time()
+        try: self._write_snapshot(data, fetched_at)
+        except OSError as e: print(f"Warning: Could not write {self.name} snapshot. Reason: {e}")
+        return data, fetched_at
+
+    def _background_refresh(self):
+        try:
+            data, fetched_at = self._fetch()
+            with self._lock:
+                self._data, self._loaded_at = data, fetched_at
+        except Exception as e:
+            print(f"Warning: Could not refresh {self.name}. Reason: {e}")
+            self._loaded_at = time.time() - self.ttl + RETRY_AFTER_FAILURE
+        finally:
+            self._refreshing = False
+
+    def _ensure(self):
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    data, fetched_at = self._read_snapshot()
+                    if data is None:
+                        try: data, fetched_at = self._fetch()
+                        except Exception as e:
+                            print(f"Warning: Could not fetch {self.name}. Reason: {e}")
+                            data, fetched_at = frozenset(), time.time() - self.ttl + RETRY_AFTER_FAILURE
+                    self._data, self._loaded_at = data, fetched_at
+        if time.time() - self._loaded_at > self.ttl and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._background_refresh, name=f"refresh-{self.name}", daemon=True).start()
+        return self._data
+
+    def refresh(self):
+        """Fetch synchronously and replace the in-memory map and snapshot."""
+        data, fetched_at = self._fetch()
+        with self._lock:
+            self._data, self._loaded_at = data, fetched_at
+
+    # --- set/dict interface ---
+    def __contains__(self, key) -> bool:
+        return key in self._ensure()
+
+    def __len__(self) -> int:
+        return len(self._ensure())
+
+    def __iter__(self):
+        return iter(self._ensure())
+
+    def get(self, key, default=None):
+        data = self._ensure()
+        return data.get(key, default) if isinstance(data, dict) else default
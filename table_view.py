@@ -0,0 +1,59 @@
+# table_view.py
+
+import math
+import pandas as pd
+import streamlit as st
+from market_listing import PROCESSED_COLS
+
+CMC_CURRENCY_URL = "https://coinmarketcap.com/currencies/"
+PAGE_SIZES = [25, 50, 100, 250]
+
+# === Vectorized CoinMarketCap links ===
+_slug_cache: dict[str, str] = {}
+
+def name_slugs(names: pd.Series) -> pd.Series:
+    """CoinMarketCap slugs for `names`; each distinct name is slugged once per process."""
+    names = names.astype(object).fillna('nan').astype(str)
+    missing = pd.Series(pd.unique(names[~names.isin(_slug_cache.keys())]))
+    if len(missing):
+        slugs = missing.str.replace(r'[^a-zA-Z0-9 -]', '', regex=True).str.strip().str.lower().str.replace(' ', '-', regex=False)
+        _slug_cache.update(zip(missing, slugs))
+    return names.map(_slug_cache)
+
+def make_name_clickable(df):
+    df_display = df.copy()
+    if 'name' not in df_display.columns: return df_display
+    names = df_display['name'].astype(object).fillna('nan').astype(str)
+    df_display['name'] = '<a target="_blank" href="' + CMC_CURRENCY_URL + name_slugs(names) + '/">' + names + '</a>'
+    return df_display
+
+# === Styling ===
+def style_dataframe(df):
+    def _color_change(val):
+        if not isinstance(val, (int, float)): return ''; return f"color: {'#4CAF50' if val > 0 else ('#F44336' if val < 0 else 'white')}"
+    def _style_vci(v):
+        if not isinstance(v, (int, float)): return '';
+        if v > 2.5: return 'background-color: #FFC107';
+        if v > 1.6: return 'background-color: #4CAF50'; return ''
+    styled = df.style.map(_color_change, subset=[c for c in [PROCESSED_COLS['percent_change_7d'], 'mom'] if c in df.columns])
+    if 'vci' in df.columns: styled = styled.map(_style_vci, subset=['vci'])
+    formats = {'price': "${:,.4f}",'market_cap': "${:,.0f}",'volume_24h': "${:,.0f}",'percent_change_7d': "{:,.2f}%","mom": "{:,.2f}%", "volume_mc_ratio": "{:,.2f}", "score": "{:,.3f}"}
+    return styled.format({k: v for k, v in formats.items() if k in df.columns})
+
+# === Paginated table (sorted server-side, only the visible page is styled and sent) ===
+def sorted_page(df: pd.DataFrame, sort_by: str, ascending: bool, page: int, page_size: int) -> pd.DataFrame:
+    ordered = df.sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+    return ordered.iloc[(page - 1) * page_size: page * page_size]
+
+def render_table(df: pd.DataFrame, key: str, sort_by: str | None = None, ascending: bool = False):
+    cols = list(df.columns)
+    c1, c2, c3, c4 = st.columns([3, 1, 1, 1])
+    sort_by = c1.selectbox("مرتب‌سازی بر اساس", cols, index=cols.index(sort_by) if sort_by in cols else 0, key=f"{key}_sort")
+    ascending = c2.toggle("صعودی", value=ascending, key=f"{key}_asc")
+    page_size = c3.selectbox("تعداد در صفحه", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    n_pages = max(1, math.ceil(len(df) / page_size))
+    page = int(c4.number_input("صفحه", min_value=1, max_value=n_pages, value=1, step=1, key=f"{key}_page"))
+    page_df = sorted_page(df, sort_by, ascending, min(page, n_pages), page_size)
+    st.write(style_dataframe(make_name_clickable(page_df)).to_html(escape=False), unsafe_allow_html=True)
+    first = (min(page, n_pages) - 1) * page_size
+    st.caption(f"نمایش {first + 1:,}–{first + len(page_df):,} از {len(df):,} (صفحه {min(page, n_pages)} از {n_pages})")
@@ -0,0 +1,12 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# module-level stores (candle store, shared cache, snapshots) open under DATA_DIR at import time
+os.environ["SCREENER_DATA_DIR"] = tempfile.mkdtemp(prefix="screener-tests-")
@@ -0,0 +1,37 @@
+# tests/test_filter_engine.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from filter_engine import RangeFilterEngine
+from market_listing import PRESETS, PROCESSED_COLS, compact_listing, filter_listing, volume_mc_ratio
+
+@pytest.fixture(params=["processed", "compact"])
+def listing(request):
+    rng = np.random.default_rng(11)
+    n = 5000
+    df = pd.DataFrame({PROCESSED_COLS["symbol"]: [f"C{i}" for i in range(n)], PROCESSED_COLS["name"]: [f"Coin {i}" for i in range(n)],
+                       PROCESSED_COLS["price"]: rng.lognormal(0, 2, n), PROCESSED_COLS["market_cap"]: 10 ** rng.uniform(5, 10, n),
+                       PROCESSED_COLS["percent_change_7d"]: rng.normal(0, 12, n)})
+    df[PROCESSED_COLS["volume_24h"]] = df[PROCESSED_COLS["market_cap"]] * rng.uniform(0, 2.5, n)
+    # rows sitting exactly on every preset bound, so inclusive edges are exercised
+    for i, params in enumerate(PRESETS.values()):
+        for j, (lo, hi) in enumerate([("min_market_cap", "max_market_cap"), ("min_change_7d", "max_change_7d")]):
+            df.loc[10 * i + 2 * j, PROCESSED_COLS["market_cap" if j == 0 else "percent_change_7d"]] = params[lo]
+            df.loc[10 * i + 2 * j + 1, PROCESSED_COLS["market_cap" if j == 0 else "percent_change_7d"]] = params[hi]
+    df["volume_mc_ratio"] = volume_mc_ratio(df)
+    return compact_listing(df) if request.param == "compact" else df
+
+@pytest.mark.parametrize("preset", list(PRESETS))
+def test_matches_filter_listing(listing, preset):
+    expected = filter_listing(listing, PRESETS[preset])
+    got = RangeFilterEngine(listing).filter(PRESETS[preset])
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(got, expected)
+
+def test_inverted_range_is_empty_like_filter_listing(listing):
+    params = {**PRESETS["Balanced"], "min_market_cap": 150e6, "max_market_cap": 10e6}
+    expected = filter_listing(listing, params)
+    got = RangeFilterEngine(listing).filter(params)
+    assert expected.empty
+    pd.testing.assert_frame_equal(got, expected)
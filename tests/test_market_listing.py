@@ -0,0 +1,28 @@
+# tests/test_market_listing.py
+
+import threading
+import time
+import pandas as pd
+import market_listing
+from market_listing import ListingStore, LISTING_COLUMNS
+
+def _listing(n: int) -> pd.DataFrame:
+    return pd.DataFrame([{"id": i, "symbol": f"C{i}", "name": f"Coin {i}", "price": 1.0, "volume24h": 1e6,
+                          "marketCap": 1e9 / i, "percentChange7d": 1.0} for i in range(1, n + 1)], columns=LISTING_COLUMNS)
+
+def test_concurrent_refreshes_crawl_once(tmp_path, monkeypatch):
+    calls = []
+    def fetch_listing(max_coins=None):
+        calls.append(max_coins)
+        time.sleep(0.2)
+        return _listing(50)
+    monkeypatch.setattr(market_listing, "fetch_listing", fetch_listing)
+    store = ListingStore(str(tmp_path))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.refresh(full=True))) for _ in range(3)]
+    for t in threads: t.start()
+    for t in threads: t.join(10)
+    assert calls == [None]
+    assert len({r["path"] for r in results}) == 1
+    store.refresh(full=True)  # a later, non-overlapping refresh still crawls
+    assert calls == [None, None]
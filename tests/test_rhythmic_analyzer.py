@@ -0,0 +1,102 @@
+# tests/test_rhythmic_analyzer.py
+
+import time
+import numpy as np
+import pytest
+import rhythmic_analyzer as ra
+from candle_store import candle_store
+
+@pytest.fixture
+def fake_binance(monkeypatch):
+    from fake_market_server import FakeMarketServer
+    with FakeMarketServer(20) as server:
+        monkeypatch.setattr(ra, "BINANCE_OHLCV_URL", server.env()["BINANCE_API_BASE"] + "/api/v3/klines")
+        candle_store.clear()
+        yield server
+        candle_store.clear()
+
+@pytest.mark.parametrize("interval, limit", [("1d", 30), ("1h", 720)])
+def test_binance_refetch_after_long_gap_returns_newest_candles(fake_binance, interval, limit):
+    step = ra.INTERVAL_SECONDS[interval]
+    last = (int(time.time()) // step - 2 * limit) * step  # stored twice `limit` candles ago
+    candle_store.upsert("C1USDT", "binance", [last - step, last], [1.0, 1.0], [1.0, 1.0], interval)
+    candle_store.mark_fetched("C1USDT", "binance", interval, at=last)
+    ohlcv = ra.get_ohlcv_from_binance("C1USDT", interval, limit)
+    assert len(ohlcv["times"]) == limit
+    assert ohlcv["times"][-1] >= time.time() - 2 * step
+    assert (ohlcv["times"][1:] - ohlcv["times"][:-1] == step).all()
+
+def test_binance_short_gap_fetches_incrementally(fake_binance):
+    ra.get_ohlcv_from_binance("C1USDT", "1d", 30)
+    requests = fake_binance.requests
+    candle_store.mark_fetched("C1USDT", "binance", "1d", at=0)  # stale, so the next read goes to the network
+    ohlcv = ra.get_ohlcv_from_binance("C1USDT", "1d", 30)
+    assert fake_binance.requests == requests + 1
+    assert len(ohlcv["times"]) == 30 and ohlcv["times"][-1] >= time.time() - 2 * ra.DAY
+
+def _same(a, b) -> bool:
+    """Dict equality where NaN equals NaN."""
+    if a.keys() != b.keys(): return False
+    return all(x == y or (x != x and y != y) for x, y in ((a[k], b[k]) for k in a))
+
+def test_score_coins_matches_simple_rhythm_filter(monkeypatch):
+    rng = np.random.default_rng(3)
+    def candles(n, volumes=None):
+        return {"times": np.arange(n) * ra.DAY, "closes": np.ones(n), "volumes": rng.lognormal(5, 0.7, n) if volumes is None else volumes}
+    spike = candles(40); spike["volumes"][-1] *= 10
+    nan_inside = candles(40); nan_inside["volumes"][20] = np.nan
+    nan_last = candles(40); nan_last["volumes"][-1] = np.nan
+    series = {"SHORT": candles(12), "ZERO": candles(40, np.zeros(40)), "NANIN": nan_inside, "NANLAST": nan_last,
+              "SPIKE": spike, "PLAIN": candles(30), "LONG": candles(200), "NONE": None}
+    monkeypatch.setattr(ra, "get_ohlcv", lambda symbol: series[symbol])
+    coins = [{"symbol": s, "percent_change_7d": pct} for s in series
+             for pct in (3.0, 0.2, 15.0, np.float64(5.5), 7, "n/a", None, True)]
+    fetched = [ra.fetch_coin_ohlcv(c) for c in coins]
+    batch, single = ra.score_coins(coins, fetched), [ra.analyze_coin(c) for c in coins]
+    for coin, b, s in zip(coins, batch, single):
+        assert _same(b, s), (coin, b, s)
+    assert any(r["pass"] for r in single) and any(r.get("reason") == "too_few_candles" for r in single)
+
+def test_coingecko_volume_request_failure_counts_against_provider(monkeypatch):
+    from fake_market_server import FakeMarketServer
+    from provider_health import ProviderHealth
+    import requests
+    with FakeMarketServer(20) as server:
+        base = server.env()["COINGECKO_API_BASE"]
+        monkeypatch.setattr(ra, "COINGECKO_OHLC_URL", base + "/api/v3/coins/{id}/ohlc")
+        monkeypatch.setattr(ra, "COINGECKO_VOL_URL", base + "/api/v3/coins/{id}/market_chart")
+        monkeypatch.setattr(ra, "coingecko_map", {"c6": "coin-6"})
+        monkeypatch.setattr(ra, "provider_health", health := ProviderHealth())
+        monkeypatch.setattr(ra.http, "max_retries", 0)
+        get = ra.http.session.get
+        def throttled(url, **kwargs):
+            if "market_chart" not in url: return get(url, **kwargs)
+            r = requests.Response()
+            r.status_code, r.url = 429, url
+            return r
+        monkeypatch.setattr(ra.http.session, "get", throttled)
+        candle_store.clear()
+        ra._timed_fetch("coingecko", "C6")
+        candle_store.clear()
+    assert health._stats["coingecko"]["success"] == 0.0
+
+def test_intraday_skips_forming_candle_until_a_later_fetch_closes_it(monkeypatch):
+    step = 3600
+    now = int(time.time()) // step * step
+    times = list(range(now - 40 * step, now + step, step))  # the last candle was still forming at fetch time
+    candle_store.clear(); ra.reset_intraday_state()
+    candle_store.upsert("X", "coinbase", times, [1.0] * 41, [100.0] * 40 + [5.0], "1h")
+    candle_store.mark_fetched("X", "coinbase", "1h", at=now + step - 60)
+    monkeypatch.setattr(ra, "intraday_provider", lambda symbol: "coinbase")
+    monkeypatch.setattr(time, "time", lambda: now + step + 30)  # closed by the wall clock, store still fresh
+    ra.analyze_coin_intraday({"symbol": "X", "percent_change_7d": 3}, "1h")
+    state = ra.intraday_state("X", "coinbase", "1h")
+    assert state.last_ts == now - step and state.last_volume == 100.0
+
+    candle_store.upsert("X", "coinbase", [now], [1.0], [500.0], "1h")  # the next fetch stores its final volume
+    candle_store.mark_fetched("X", "coinbase", "1h", at=now + step + 60)
+    monkeypatch.setattr(time, "time", lambda: now + step + 90)
+    result = ra.analyze_coin_intraday({"symbol": "X", "percent_change_7d": 3}, "1h")
+    assert state.last_ts == now and state.last_volume == 500.0
+    assert result["vci"] == pytest.approx(5.0, rel=1e-6)
+    candle_store.clear(); ra.reset_intraday_state()
@@ -0,0 +1,35 @@
+# tests/test_rolling_stats.py
+
+import numpy as np
+import pytest
+from rolling_stats import RollingMedian, RollingVCI
+
+@pytest.mark.parametrize("window", [1, 2, 3, 7, 30, 100])
+@pytest.mark.parametrize("values", ["duplicates", "spread"])
+def test_rolling_median_matches_numpy(window, values):
+    rng = np.random.default_rng(window)
+    # few distinct values put window leavers on both heap tops; the length forces several _rebuild passes
+    stream = rng.integers(0, 5, 3000).astype(float) if values == "duplicates" else rng.lognormal(5, 1, 3000).round(1)
+    rm = RollingMedian(window)
+    for i, x in enumerate(stream):
+        rm.push(x)
+        assert rm.median() == np.median(stream[max(0, i + 1 - window):i + 1]), (i, x)
+        assert len(rm._low) + len(rm._high) <= 2 * window + 64
+
+def test_empty_median_is_none():
+    assert RollingMedian(5).median() is None
+
+def test_rolling_vci_matches_batch_and_skips_seen_candles():
+    rng = np.random.default_rng(1)
+    times, volumes = np.arange(200) * 3600, rng.integers(0, 4, 200).astype(float) * 100
+    vci = RollingVCI(30)
+    assert vci.update(times[:120], volumes[:120]) == 120
+    assert vci.update(times[:150], volumes[:150]) == 30  # overlap with what was already consumed is skipped
+    assert vci.update(times, volumes) == 50
+    assert vci.last_ts == times[-1] and vci.last_volume == volumes[-1]
+    assert vci.value() == pytest.approx(volumes[-1] / (np.median(volumes[-30:]) + 1e-9))
+
+def test_rolling_vci_without_volume_has_no_value():
+    vci = RollingVCI(30)
+    vci.update(np.arange(40), np.zeros(40))
+    assert not vci.has_volume() and vci.value() is None
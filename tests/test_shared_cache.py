@@ -0,0 +1,102 @@
+# tests/test_shared_cache.py
+
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from shared_cache import SharedCache, SQLiteBackend, RedisBackend, encode
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_backend(request, tmp_path):
+    """Factory returning a fresh client of one shared store per call, as separate replicas would hold."""
+    if request.param == "sqlite":
+        path = str(tmp_path / "shared.db")
+        yield lambda: SQLiteBackend(path)
+        return
+    pytest.importorskip("redis")
+    from fake_redis_server import FakeRedisServer
+    with FakeRedisServer() as server:
+        yield lambda: RedisBackend.from_url(server.url)
+
+def _race(caches, key, compute):
+    """Call get_or_compute on every cache at the same moment, one thread each; returns their results."""
+    barrier, results = threading.Barrier(len(caches)), [None] * len(caches)
+    def worker(i):
+        barrier.wait()
+        results[i] = caches[i].get_or_compute(key, compute, ttl=60)
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(caches))]
+    for t in threads: t.start()
+    for t in threads: t.join(10)
+    return results
+
+def test_two_replicas_compute_once(make_backend):
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"rows": [1, 2, 3]}
+    caches = [SharedCache(make_backend(), poll=0.01) for _ in range(2)]  # no shared in-process flight
+    assert _race(caches, "listing:current", compute) == [{"rows": [1, 2, 3]}] * 2
+    assert len(calls) == 1
+    assert caches[0].get_or_compute("listing:current", compute, ttl=60) == {"rows": [1, 2, 3]}
+    assert len(calls) == 1
+
+def test_threads_of_one_process_compute_once(make_backend):
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+    cache = SharedCache(make_backend(), poll=0.01)
+    assert _race([cache] * 4, "ohlcv:1d:BTC", compute) == [42] * 4
+    assert len(calls) == 1
+
+def test_store_failure_does_not_recompute(make_backend):
+    calls = []
+    def compute():
+        calls.append(1)
+        return lambda: None  # not data, so the shared write fails after compute ran
+    cache = SharedCache(make_backend(), poll=0.01)
+    assert callable(cache.get_or_compute("ohlcv:1d:ETH", compute, ttl=60))
+    assert len(calls) == 1
+    assert not cache.backend.locked("ohlcv:1d:ETH")
+
+class _BrokenBackend:
+    def get(self, key): raise ConnectionError("down")
+
+def test_unreachable_backend_computes_directly():
+    calls = []
+    cache = SharedCache(_BrokenBackend())
+    assert cache.get_or_compute("listing:current", lambda: calls.append(1) or "fresh", ttl=60) == "fresh"
+    assert len(calls) == 1
+
+def test_compute_error_propagates_and_releases_lock(make_backend):
+    cache = SharedCache(make_backend(), poll=0.01)
+    def boom(): raise ValueError("upstream")
+    with pytest.raises(ValueError):
+        cache.get_or_compute("listing:current", boom, ttl=60)
+    assert not cache.backend.locked("listing:current")
+    assert cache.get_or_compute("listing:current", lambda: "ok", ttl=60) == "ok"
+
+def test_entries_round_trip_through_the_backend(make_backend):
+    ohlcv = {"times": np.arange(5, dtype=np.int64) * 86400, "closes": np.linspace(1, 2, 5), "volumes": np.array([1.0, np.nan, 0, 3, 4])}
+    listing = ("/data/listing-1.parquet", pd.DataFrame({"symbol": ["BTC", "ETH"], "price": [1.5, 2.5], "rank": [1, 2]}))
+    writer, reader = SharedCache(make_backend()), SharedCache(make_backend())
+    for key, value in [("ohlcv:1d:BTC", ohlcv), ("listing:current", listing), ("ohlcv:1d:NONE", None)]:
+        writer.get_or_compute(key, lambda: value, ttl=60)
+        cached = reader.get_or_compute(key, lambda: pytest.fail("recomputed"), ttl=60)
+        if key == "ohlcv:1d:BTC":
+            assert cached.keys() == ohlcv.keys()
+            for k in ohlcv:
+                np.testing.assert_array_equal(cached[k], ohlcv[k])
+                assert cached[k].dtype == ohlcv[k].dtype
+        elif key == "listing:current":
+            assert isinstance(cached, tuple) and cached[0] == listing[0]
+            pd.testing.assert_frame_equal(cached[1], listing[1])
+        else:
+            assert cached is None
+
+def test_object_arrays_are_not_encoded():
+    with pytest.raises(TypeError):
+        encode({"times": np.array([object()])})
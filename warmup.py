@@ -0,0 +1,105 @@
+# warmup.py
+"""Background warm-up: keeps the listing snapshot and the candle store hot for every preset's candidates.
+
+Started once per Streamlit process (WARMUP_INTERVAL > 0), or run as a sidecar next to the app:
+    python warmup.py            # a pass every WARMUP_INTERVAL seconds
+    python warmup.py --once
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import WARMUP_INTERVAL, WARMUP_MAX_WORKERS, WARMUP_COINBASE
+from market_listing import listing_store, PROCESSED_COLS, PRESETS, process_dataframe, volume_mc_ratio, filter_listing
+from rhythmic_analyzer import lookup_ohlcv, get_ohlcv_from_coinbase
+from metrics import metrics
+
+def preset_candidates(presets: dict = PRESETS) -> list[str]:
+    """Symbols passing any preset on the last listing snapshot, in market-cap order."""
+    df = process_dataframe(listing_store.load())
+    if df is None or df.empty: return []
+    df['volume_mc_ratio'] = volume_mc_ratio(df)
+    symbols = {}
+    for params in presets.values():
+        symbols.update(dict.fromkeys(filter_listing(df, params)[PROCESSED_COLS['symbol']]))
+    return list(symbols)
+
+# === Scheduler ===
+class WarmupScheduler:
+    """Refreshes the listing and prefetches OHLCV (and optionally Coinbase candles) on a fixed cadence."""
+
+    def __init__(self, interval: int = WARMUP_INTERVAL, max_workers: int = WARMUP_MAX_WORKERS,
+                 coinbase: bool = WARMUP_COINBASE, presets: dict = PRESETS):
+        self.interval, self.max_workers, self.coinbase, self.presets = interval, max_workers, coinbase, presets
+        self.last_run: dict | None = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _refresh_listing(self):
+        meta = listing_store.meta()
+        full = meta is None or time.time() - meta["full_refreshed_at"] > listing_store.full_ttl
+        listing_store.refresh(full=full)
+
+    def _warm(self, symbol: str, jobs: list) -> tuple[bool, bool]:
+        """Run every job for one symbol -> (warmed, failed); a raising job is counted, not propagated to the pass."""
+        warmed, failed = False, False
+        for i, job in enumerate(jobs):
+            try: result = job(symbol)
+            except Exception as e:
+                metrics.inc("warmup_errors_total", job=job.__name__, reason=type(e).__name__)
+                result, failed = None, True
+            if i == 0: warmed = bool(result)
+        return warmed, failed
+
+    def run_once(self) -> dict:
+        started, error = time.time(), None
+        with metrics.span("warmup"):
+            try: self._refresh_listing()
+            except Exception as e: error = f"listing: {e}"  # keep warming from the last good snapshot
+            symbols = preset_candidates(self.presets)
+            jobs = [lookup_ohlcv] + ([get_ohlcv_from_coinbase] if self.coinbase else [])
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="warmup") as pool:
+                results = list(pool.map(lambda s: self._warm(s, jobs), symbols))
+        warmed, failed = sum(w for w, _ in results), sum(f for _, f in results)
+        metrics.inc("warmup_runs_total")
+        metrics.inc("warmup_symbols_total", value=warmed)
+        self.last_run = {"started_at": started, "seconds": round(time.time() - started, 2), "symbols": len(symbols),
+                         "warmed": warmed, "failed": failed, "error": error}
+        return self.last_run
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try: self.run_once()
+            except Exception as e: self.last_run = {"started_at": time.time(), "symbols": 0, "warmed": 0, "failed": 0, "error": str(e)}
+            self._stop.wait(self.interval)
+
+    def start(self) -> "WarmupScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Keep the listing and candidate OHLCV warm for the screener.")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=int, default=WARMUP_INTERVAL or 900)
+    parser.add_argument("--workers", type=int, default=WARMUP_MAX_WORKERS)
+    parser.add_argument("--no-coinbase", action="store_true", help="skip prefetching Coinbase candles")
+    args = parser.parse_args(argv)
+    scheduler = WarmupScheduler(args.interval, args.workers, coinbase=not args.no_coinbase)
+    while True:
+        print(scheduler.run_once(), file=sys.stderr, flush=True)
+        if args.once: return 0
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    sys.exit(main())